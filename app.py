@@ -1,4 +1,4 @@
-from flask import Flask, jsonify
+from flask import Flask, jsonify, request
 from flask_cors import CORS
 from utils.leagues.nba import scraper as nba_scraper
 from utils.leagues.nfl import scraper as nfl_scraper
@@ -6,11 +6,27 @@ from utils.leagues.nba import processor as nba_processor
 from utils.leagues.nfl import processor as nfl_processor
 from utils.leagues.cbb import scraper as cbb_scraper
 from utils.leagues.cbb import processor as cbb_processor
+from utils.leagues.common.betting_events import ACTIVE_EVENT_STATUSES, fetch_active_betting_events, partition_by_league
+from utils.leagues.common.constants import NBA_LEAGUE_ID, NFL_LEAGUE_ID, CBB_LEAGUE_ID, GAMES_PER_JOB
+from utils.leagues.common.event_games import games_for_event, games_with_open_events, group_games
+from utils.leagues.common.poll_scheduler import POLL_SCHEDULER
+from utils.leagues.common.finalized_games import FINALIZED_GAMES, record_finalized_games
+from utils.leagues.common.settlement import resettle_completed_events
+from utils.leagues.nba.extractor import BOXSCORE_TRACKER as NBA_BOXSCORE_TRACKER
+from utils.leagues.nfl.extractor import BOXSCORE_TRACKER as NFL_BOXSCORE_TRACKER
+from utils.leagues.cbb.extractor import BOXSCORE_TRACKER as CBB_BOXSCORE_TRACKER
+from utils.tasks import LEAGUE_PROCESSORS, get_queue, process_game_group, job_service, record_job_status, unfinished_jobs
+from utils.state_store import STATE_STORE
+from utils.s3_service import flush_uploads_on_sigterm
 from datetime import datetime
+from concurrent.futures import Future, TimeoutError as FuturesTimeoutError
 from dotenv import load_dotenv
 import pytz
+import requests
 import os
+import time
 import logging
+import threading
 
 # Configure logging
 logging.basicConfig(
@@ -23,6 +39,202 @@ load_dotenv()
 app = Flask(__name__)
 CORS(app)
 
+# Per-league wall clock budget; a league that runs past it is reported as an
+# error so the other leagues' results are not held up waiting on it.
+LEAGUE_TIMEOUT_SECONDS = {
+    'nba': int(os.environ.get("NBA_TIMEOUT_SECONDS", 300)),
+    'nfl': int(os.environ.get("NFL_TIMEOUT_SECONDS", 300)),
+    'cbb': int(os.environ.get("CBB_TIMEOUT_SECONDS", 600)),
+}
+
+
+def games_to_poll(league, games, betting_events):
+    """
+    IDs of the games worth fetching boxscores for this run, and the betting
+    events to settle against them.
+
+    Only games that are due a poll (see PollScheduler) and have open betting
+    events are fetched.
+    Events of games that aren't due are held back until their game is polled
+    so they can't be mistaken for DNPs. An open event that maps to no game
+    (e.g. its start_time is off) could be in any of them, so then every game
+    is fetched and the event is name matched against the whole slate.
+    When the events couldn't be fetched up front every game is polled.
+    """
+    game_ids = [game["game_id"] for game in games]
+    POLL_SCHEDULER.retain(league, game_ids)
+    if betting_events is None:
+        return game_ids, None
+
+    open_games = games_with_open_events(games, betting_events)
+    due = {game["game_id"] for game in POLL_SCHEDULER.due_games(league, games)}
+    # A final game whose events are still open didn't finish settling; give it another pass
+    unsettled = {game_id for game_id in open_games if POLL_SCHEDULER.is_finished(league, game_id)}
+    if unsettled:
+        logger.warning(f"{league.upper()}: final games {sorted(unsettled)} still have open betting events, polling again")
+    due |= unsettled
+    wanted = open_games & due
+
+    events = []
+    unmapped = []
+    for event in betting_events:
+        event_games = games_for_event(games, event)
+        if not event_games:
+            unmapped.append(event)
+        elif due.intersection(event_games):
+            events.append(event)
+    if any(event.get("status") in ACTIVE_EVENT_STATUSES for event in unmapped):
+        logger.warning(f"{league.upper()}: {len(unmapped)} betting events match no game by start time, fetching every game")
+        wanted = set(game_ids)
+    logger.info(f"{league.upper()}: {len(due)} of {len(game_ids)} games due a poll, {len(wanted)} to fetch")
+    return [game_id for game_id in game_ids if game_id in wanted], events + unmapped
+
+
+def record_polls(league, games, game_ids, tracker):
+    """
+    Schedule each polled game's next poll from the status its boxscore showed.
+    Games whose fetch or parse failed this pass get no poll recorded and stay
+    due, rather than being scheduled off a stale status.
+    """
+    polled = set(game_ids) & tracker.last_pass()
+    for game in games:
+        if game["game_id"] not in polled:
+            continue
+        game_players = tracker.last_result(game["game_id"]) or {}
+        status = next(iter(game_players.values()), {}).get("game_status") or game["status"]
+        POLL_SCHEDULER.record_poll(league, game, status)
+
+
+def run_nba_pipeline(current_date, betting_events=None):
+    """Scrape and settle NBA games"""
+    logger.info("Starting NBA games scraping...")
+    nba_games = nba_scraper.scrape_game_schedule(current_date)
+    logger.info(f"Found {len(nba_games)} NBA games: {[game['game_id'] for game in nba_games]}")
+    nba_game_ids, betting_events = games_to_poll("nba", nba_games, betting_events)
+
+    logger.info("Processing NBA boxscores...")
+    completed = nba_processor.process_boxscores(nba_game_ids, current_date, testing_mode=False, testing="", betting_events=betting_events)
+    record_polls("nba", nba_games, nba_game_ids, NBA_BOXSCORE_TRACKER)
+    if completed:
+        return {
+            'status': 'success',
+            'game_count': len(nba_game_ids),
+            'game_ids': nba_game_ids
+        }
+    logger.info("NBA processing failed")
+    return {
+        'status': 'error',
+        'error': 'NBA processing failed'
+    }
+
+
+def run_nfl_pipeline(current_date, betting_events=None):
+    """Scrape and settle NFL games"""
+    logger.info("Starting NFL games scraping...")
+    nfl_games = nfl_scraper.scrape_game_schedule(current_date)
+    logger.info(f"Found {len(nfl_games)} NFL games: {[game['game_id'] for game in nfl_games]}")
+    nfl_game_ids, betting_events = games_to_poll("nfl", nfl_games, betting_events)
+
+    logger.info("Processing NFL boxscores...")
+    nfl_processor.process_boxscores(nfl_game_ids, current_date, testing_mode=False, testing="", betting_events=betting_events)
+    record_polls("nfl", nfl_games, nfl_game_ids, NFL_BOXSCORE_TRACKER)
+    logger.info("NFL processing completed successfully")
+    return {
+        'status': 'success',
+        'game_count': len(nfl_game_ids),
+        'game_ids': nfl_game_ids
+    }
+
+
+def run_cbb_pipeline(current_date, betting_events=None):
+    """Scrape and settle CBB games"""
+    logger.info("Starting CBB games scraping...")
+    cbb_games = cbb_scraper.scrape_game_schedule(current_date)
+    logger.info(f"Found {len(cbb_games)} CBB games: {[game['game_id'] for game in cbb_games]}")
+    cbb_game_ids, betting_events = games_to_poll("cbb", cbb_games, betting_events)
+    completed = cbb_processor.process_boxscores(cbb_game_ids, current_date, testing_mode=False, testing="", betting_events=betting_events)
+    record_polls("cbb", cbb_games, cbb_game_ids, CBB_BOXSCORE_TRACKER)
+    if completed:
+        return {
+            'status': 'success',
+            'game_count': len(cbb_game_ids),
+            'game_ids': cbb_game_ids
+        }
+    return {'status': 'pending'}
+
+
+LEAGUE_PIPELINES = {
+    'nba': run_nba_pipeline,
+    'nfl': run_nfl_pipeline,
+    'cbb': run_cbb_pipeline,
+}
+
+LEAGUE_SCRAPERS = {
+    'nba': nba_scraper,
+    'nfl': nfl_scraper,
+    'cbb': cbb_scraper,
+}
+
+LEAGUE_BOXSCORE_TRACKERS = {
+    'nba': NBA_BOXSCORE_TRACKER,
+    'nfl': NFL_BOXSCORE_TRACKER,
+    'cbb': CBB_BOXSCORE_TRACKER,
+}
+
+LEAGUE_IDS = {
+    'nba': NBA_LEAGUE_ID,
+    'nfl': NFL_LEAGUE_ID,
+    'cbb': CBB_LEAGUE_ID,
+}
+
+
+def fetch_events_by_league():
+    """
+    Fetch the active betting events once for the whole run and split them by
+    league. Returns None on failure so each league fetches its own.
+    """
+    try:
+        betting_events = fetch_active_betting_events()
+    except requests.exceptions.RequestException as e:
+        logger.error(f"Failed to fetch active betting events: {str(e)}")
+        return None
+    logger.info(f"Found {len(betting_events)} active betting events")
+    return partition_by_league(betting_events)
+
+
+# Each league's latest pipeline run. A run that timed out keeps going in the
+# background, and its league is skipped until it finishes so two pipelines
+# never settle the same events at once.
+_league_runs = {}
+_league_runs_lock = threading.Lock()
+
+
+def start_league_pipeline(league, pipeline, *args):
+    """
+    Run a league pipeline on its own daemon thread, returning a Future for its
+    results or None if the league's previous run is still going. Daemon threads
+    don't hold up interpreter exit, so a stuck league can't outlive the timeout
+    of a one-shot run.
+    """
+    with _league_runs_lock:
+        previous = _league_runs.get(league)
+        if previous is not None and not previous.done():
+            return None
+        future = Future()
+        _league_runs[league] = future
+
+    def run():
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            future.set_result(pipeline(*args))
+        except BaseException as e:
+            future.set_exception(e)
+
+    threading.Thread(target=run, name=f"league-{league}", daemon=True).start()
+    return future
+
+
 def scrape_all_games():
     """Function to scrape both NBA, NFL, and CBB games"""
     job_start_time = datetime.now(pytz.timezone('US/Pacific'))
@@ -30,78 +242,49 @@ def scrape_all_games():
     
     try:
         current_date = datetime.now()
-        results = {
-            'nba': {'status': 'pending'},
-            'nfl': {'status': 'pending'}, 
-            'cbb': {'status': 'pending'}
-        }
+        results = {league: {'status': 'pending'} for league in LEAGUE_PIPELINES}
+        events_by_league = fetch_events_by_league()
 
-        # Process NBA games
-        try:
-            logger.info("Starting NBA games scraping...")
-            nba_game_ids = nba_scraper.scrape_games(current_date)
-            logger.info(f"Found {len(nba_game_ids)} NBA games: {nba_game_ids}")
-            
-            logger.info("Processing NBA boxscores...")
-            completed = nba_processor.process_boxscores(nba_game_ids, current_date, testing_mode=False, testing="")
-            if completed:
-                results['nba'] = {
-                    'status': 'success',
-                    'game_count': len(nba_game_ids),
-                    'game_ids': nba_game_ids
+        # Each league runs on its own thread so a slow or stuck league never
+        # delays settlement for the others.
+        started = time.monotonic()
+        futures = {}
+        for league, pipeline in LEAGUE_PIPELINES.items():
+            future = start_league_pipeline(
+                league,
+                pipeline,
+                current_date,
+                None if events_by_league is None else events_by_league.get(LEAGUE_IDS[league], [])
+            )
+            if future is None:
+                logger.warning(f"Skipping {league.upper()}: its previous pipeline run is still in progress")
+                results[league] = {
+                    'status': 'skipped',
+                    'error': f'Previous {league.upper()} run still in progress'
                 }
-            else:
-                logger.info("NBA processing failed")
-                results['nba'] = {
+                continue
+            futures[league] = future
+
+        for league, future in futures.items():
+            timeout = LEAGUE_TIMEOUT_SECONDS[league]
+            try:
+                results[league] = future.result(timeout=max(0, timeout - (time.monotonic() - started)))
+            except FuturesTimeoutError:
+                # The pipeline keeps running on its thread; later runs skip the league until it's done
+                logger.error(f"{league.upper()} processing timed out after {timeout} seconds")
+                results[league] = {
                     'status': 'error',
-                    'error': 'NBA processing failed'
+                    'error': f'{league.upper()} processing timed out after {timeout} seconds'
                 }
-        except Exception as e:
-            logger.error(f"Error processing NBA games: {str(e)}", exc_info=True)
-            results['nba'] = {
-                'status': 'error',
-                'error': str(e)
-            }
-
-        # Process NFL games
-        try:
-            logger.info("Starting NFL games scraping...")
-            nfl_game_ids = nfl_scraper.scrape_games(current_date)
-            logger.info(f"Found {len(nfl_game_ids)} NFL games: {nfl_game_ids}")
-            
-            logger.info("Processing NFL boxscores...")
-            nfl_processor.process_boxscores(nfl_game_ids, current_date, testing_mode=False, testing="")
-            results['nfl'] = {
-                'status': 'success',
-                'game_count': len(nfl_game_ids),
-                'game_ids': nfl_game_ids
-            }
-            logger.info("NFL processing completed successfully")
-        except Exception as e:
-            logger.error(f"Error processing NFL games: {str(e)}", exc_info=True)
-            results['nfl'] = {
-                'status': 'error',
-                'error': str(e)
-            }
-        
-        # Process CBB games
-        try:
-            logger.info("Starting CBB games scraping...")
-            cbb_game_ids = cbb_scraper.scrape_games(current_date)
-            logger.info(f"Found {len(cbb_game_ids)} CBB games: {cbb_game_ids}")
-            completed = cbb_processor.process_boxscores(cbb_game_ids, current_date, testing_mode=False, testing="")
-            if completed:
-                results['cbb'] = {
-                    'status': 'success',
-                    'game_count': len(cbb_game_ids),
-                    'game_ids': cbb_game_ids
+            except Exception as e:
+                logger.error(f"Error processing {league.upper()} games: {str(e)}", exc_info=True)
+                results[league] = {
+                    'status': 'error',
+                    'error': str(e)
                 }
-        except Exception as e:
-            logger.error(f"Error processing CBB games: {str(e)}", exc_info=True)
-            results['cbb'] = {
-                'status': 'error',
-                'error': str(e)
-            }
+
+        # Drop state older than the retention window (at most once an hour)
+        STATE_STORE.compact()
 
         job_end_time = datetime.now(pytz.timezone('US/Pacific'))
         duration = (job_end_time - job_start_time).total_seconds()
@@ -113,6 +296,108 @@ def scrape_all_games():
         return {'error': str(e)}
 
 
+def enqueue_all_games(run_job_id=None):
+    """
+    Distributed mode: instead of processing the slate here, enqueue one rq
+    job per group of GAMES_PER_JOB games for worker.py processes to fetch,
+    parse and settle. Each group gets its own jobs_espn row (whose ID is
+    also the rq job ID), and the run's row lists them. The run's row is
+    created and completed here unless the caller passes and records it.
+    """
+    logger.info("Starting distributed scraper run")
+    try:
+        current_date = datetime.now()
+        events_by_league = fetch_events_by_league()
+        if events_by_league is None:
+            return {'error': 'Failed to fetch active betting events'}
+
+        queue = get_queue()
+        owns_run_job = run_job_id is None
+        if owns_run_job:
+            run_job_id = job_service.create_job("espn_scrape_enqueue")
+        results = {}
+        for league, scraper in LEAGUE_SCRAPERS.items():
+            games = scraper.scrape_game_schedule(current_date)
+            game_ids, betting_events = games_to_poll(league, games, events_by_league.get(LEAGUE_IDS[league], []))
+            to_fetch = [game for game in games if game["game_id"] in game_ids]
+
+            jobs = []
+            for group in group_games(to_fetch, betting_events, GAMES_PER_JOB, slate=games):
+                job_id = job_service.create_job(f"espn_{league}_games")
+                queue.enqueue(
+                    process_game_group, league, group["game_ids"], current_date, group["betting_events"], job_id,
+                    group["shared_game_ids"], group["owned_event_ids"],
+                    job_id=job_id, job_timeout=LEAGUE_TIMEOUT_SECONDS[league]
+                )
+                jobs.append({'job_id': job_id, 'game_ids': group["game_ids"]})
+            logger.info(f"Enqueued {len(jobs)} {league.upper()} jobs for {len(game_ids)} games")
+            results[league] = {'status': 'enqueued', 'jobs': jobs}
+
+        if owns_run_job:
+            job_service.update_job_status(run_job_id, "completed", results)
+        return {'job_id': run_job_id, **results}
+    except Exception as e:
+        logger.error(f"Fatal error enqueuing scraper jobs: {str(e)}", exc_info=True)
+        return {'error': str(e)}
+
+
+# The scraper run started by /run-scraper that is still in flight, if any;
+# further triggers join it rather than starting an overlapping scrape. A
+# distributed run stays in flight until the rq jobs it enqueued have finished.
+_current_run = {"job_id": None, "thread": None, "rq_job_ids": []}
+_current_run_lock = threading.Lock()
+
+
+def run_scraper_job(job_id: str, distributed: bool = False):
+    """
+    Run scrape_all_games (or enqueue_all_games) in the background, recording
+    its progress on the jobs_espn row
+    """
+    record_job_status(job_id, "running")
+    try:
+        results = enqueue_all_games(job_id) if distributed else scrape_all_games()
+    except Exception as e:
+        logger.error(f"Scraper job {job_id} failed: {str(e)}", exc_info=True)
+        results = {'error': str(e)}
+    if distributed:
+        rq_job_ids = [
+            job['job_id'] for league_result in results.values() if isinstance(league_result, dict)
+            for job in league_result.get('jobs', [])
+        ]
+        with _current_run_lock:
+            _current_run["rq_job_ids"] = rq_job_ids
+    record_job_status(job_id, "failed" if 'error' in results else "completed", results)
+
+
+def run_in_flight() -> bool:
+    # Called with _current_run_lock held
+    thread = _current_run["thread"]
+    if thread is not None and thread.is_alive():
+        return True
+    _current_run["rq_job_ids"] = unfinished_jobs(_current_run["rq_job_ids"])
+    return bool(_current_run["rq_job_ids"])
+
+
+def start_scraper_run(distributed: bool = False):
+    """
+    Start a background scraper run and return its job ID, or the ID of the
+    run already in flight (including a distributed run whose rq jobs are
+    still queued or running), whichever mode it was started in.
+
+    Returns:
+        tuple: (job_id, started) where started is False when joining a run
+    """
+    with _current_run_lock:
+        if run_in_flight():
+            return _current_run["job_id"], False
+        job_id = job_service.create_job("espn_scrape_enqueue" if distributed else "espn_scrape")
+        thread = threading.Thread(target=run_scraper_job, args=(job_id, distributed), name="scraper-run", daemon=True)
+        _current_run.update(job_id=job_id, thread=thread, rq_job_ids=[])
+        thread.start()
+    logger.info(f"Started {'distributed ' if distributed else ''}scraper job {job_id}")
+    return job_id, True
+
+
 def scrape_cbb_games():
     job_start_time = datetime.now(pytz.timezone('US/Pacific'))
     logger.info(f"Starting scraper job at {job_start_time}")
@@ -154,20 +439,80 @@ def health_check():
 
 @app.route('/run-scraper', methods=['GET'])
 def run_scraper():
-    """Endpoint to manually trigger the scraper"""
+    """
+    Endpoint to manually trigger the scraper. Returns a job ID straight away
+    and scrapes in the background (poll /jobs/<job_id>); a trigger while a run
+    is in flight gets that run's job ID. ?mode=distributed enqueues the games
+    for workers instead; that run's row lists the per-group jobs.
+    """
     try:
-        results = scrape_all_games()
+        job_id, started = start_scraper_run(distributed=request.args.get("mode") == "distributed")
         return jsonify({
-            "status": "success",
-            "results": results
-        }), 200
+            "status": "accepted",
+            "job_id": job_id,
+            "joined": not started
+        }), 202
     except Exception as e:
         return jsonify({
             "status": "error",
             "error": str(e)
         }), 500
 
+@app.route('/jobs/<job_id>', methods=['GET'])
+def job_status(job_id):
+    """Status and result of a scraper job"""
+    try:
+        job = job_service.get_job_details(job_id)
+    except requests.exceptions.RequestException as e:
+        return jsonify({"status": "error", "error": str(e)}), 502
+    if job is None:
+        return jsonify({"status": "error", "error": f"Unknown job {job_id}"}), 404
+    return jsonify(job), 200
+
+@app.route('/games/<league>/<game_id>/resettle', methods=['POST'])
+def resettle_game(league, game_id):
+    """
+    Manual override after an ESPN stat correction: refetch a game and complete
+    its already completed events again wherever the corrected value differs.
+    """
+    if league not in LEAGUE_BOXSCORE_TRACKERS:
+        return jsonify({"status": "error", "error": f"Unknown league {league}"}), 404
+    tracker = LEAGUE_BOXSCORE_TRACKERS[league]
+    final_entry = FINALIZED_GAMES.get(league, game_id)
+    final_stat_hash = final_entry["stat_hash"] if final_entry else None
+    released = FINALIZED_GAMES.release(league, game_id)
+    tracker.forget(game_id)
+    POLL_SCHEDULER.forget(league, game_id)
+
+    processor = LEAGUE_PROCESSORS[league]
+    result = processor.process_game_data(game_id, datetime.now())
+    if not result:
+        return jsonify({"status": "error", "error": f"Could not fetch {league.upper()} game {game_id}"}), 502
+    stat_hash = tracker.fingerprint(game_id)
+    # Without a finalized entry to compare against, check every event
+    stats_changed = final_stat_hash is None or stat_hash != final_stat_hash
+    settlement_results = []
+    if stats_changed:
+        settlement_results = resettle_completed_events(
+            league, LEAGUE_IDS[league], game_id, result[0], processor.calculate_stat_value
+        )
+    record_finalized_games(
+        league, {game_id: result},
+        {item["event_id"]: {"game_id": game_id} for item in settlement_results},
+        settlement_results, tracker
+    )
+    return jsonify({
+        "status": "success",
+        "released": released,
+        "final_stat_hash": final_stat_hash,
+        "stat_hash": stat_hash,
+        "stats_changed": stats_changed,
+        "resettled": settlement_results
+    }), 200
+
 if __name__ == "__main__":
+    flush_uploads_on_sigterm()
+
     # Run the initial scrape
     logger.info("Running initial scraper job")
     scrape_all_games()
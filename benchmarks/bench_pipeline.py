@@ -0,0 +1,270 @@
+#!/usr/bin/env python
+"""
+Replay the bundled NBA boxscore fixtures through the full NBA pipeline offline.
+
+A local HTTP server stands in for ESPN, the backend REST actions, auth and
+Hasura GraphQL, and S3 uploads go to an in-memory store. Every stage of
+process_boxscores is timed and reported with p50/p99 so regressions in the
+hot path show up before deploy.
+
+Run from the repo root:
+    python -m benchmarks.bench_pipeline [--games 12] [--rounds 20] [--settle in_progress|complete]
+"""
+import argparse
+import base64
+import builtins
+import glob
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIXTURE_PATTERN = os.path.join(REPO_ROOT, "game_data_nba_*.json")
+NBA_LEAGUE_ID = 7
+# Fixtures are snapshots of games in progress on this (Pacific) evening
+FIXTURE_NOW = datetime(2025, 3, 11, 23, 30, tzinfo=timezone.utc)
+EVENT_STAT_TYPES = ["Points", "Rebounds", "3PT Made", "Pts+Rebs+Asts", "Fantasy Score"]
+
+
+def fake_jwt(ttl_seconds: int = 3600) -> str:
+    """Unsigned token with an exp claim, enough for AuthService's expiry parsing"""
+    def encode(part: dict) -> str:
+        return base64.urlsafe_b64encode(json.dumps(part).encode()).decode().rstrip("=")
+    return f"{encode({'alg': 'none'})}.{encode({'exp': int(time.time()) + ttl_seconds})}.sig"
+
+
+class StandIn:
+    """State shared by the local ESPN/backend/Hasura server"""
+
+    def __init__(self, boxscores: dict, betting_events: list):
+        self.boxscores = boxscores
+        self.betting_events = betting_events
+        self.requests = defaultdict(int)
+        self.lock = threading.Lock()
+
+    def count(self, route: str) -> None:
+        with self.lock:
+            self.requests[route] += 1
+
+
+def make_handler(stand_in: StandIn):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass
+
+        def _reply(self, body, status: int = 200) -> None:
+            payload = body if isinstance(body, bytes) else json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            if url.path.endswith("/boxscore"):
+                stand_in.count("espn_boxscore")
+                game_id = parse_qs(url.query).get("gameId", [""])[0]
+                if game_id not in stand_in.boxscores:
+                    return self._reply({"error": "unknown game"}, 404)
+                return self._reply(stand_in.boxscores[game_id])
+            if url.path == "/api/rest/getactivebettingevents":
+                stand_in.count("getactivebettingevents")
+                return self._reply({"betting_events": stand_in.betting_events})
+            self._reply({"error": "not found"}, 404)
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length", 0))
+            body = json.loads(self.rfile.read(length) or b"{}")
+            path = urlparse(self.path).path
+            stand_in.count(path)
+            if path == "/auth/login":
+                return self._reply({"access_token": fake_jwt()})
+            if path in ("/actions/complete-betting-event", "/actions/set-dnp"):
+                return self._reply({"success": True})
+            if path == "/v1/graphql" and "activeBettingEventsDelta" in body.get("query", ""):
+                # The stand-in's book never changes between polls
+                return self._reply({"data": {"betting_events": []}})
+            if path == "/v1/graphql":
+                updates = body.get("variables", {}).get("updates", [])
+                return self._reply({"data": {"update_betting_events_many": [{"affected_rows": 1} for _ in updates]}})
+            self._reply({"error": "not found"}, 404)
+
+    return Handler
+
+
+class LocalS3:
+    """In-memory stand-in for S3Service"""
+
+    def __init__(self):
+        self.objects = {}
+
+    def upload_file(self, file_data, s3_path: str, content_type: str = "application/json") -> bool:
+        self.objects[s3_path] = file_data
+        return True
+
+
+class StageTimer:
+    """Collects per-call durations for each named pipeline stage"""
+
+    def __init__(self):
+        self.samples = defaultdict(list)
+
+    def wrap(self, stage: str, func):
+        samples = self.samples[stage]
+
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                samples.append(time.perf_counter() - start)
+        return timed
+
+
+def percentile(samples: list, pct: float) -> float:
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def build_slate(fixtures: list, games: int):
+    """Map synthetic game IDs onto the fixtures and build betting events for their players"""
+    boxscores = {}
+    betting_events = []
+    event_start = (FIXTURE_NOW - timedelta(hours=1)).isoformat().replace("+00:00", "Z")
+    dnp_start = (FIXTURE_NOW - timedelta(hours=5)).isoformat().replace("+00:00", "Z")
+
+    for i in range(games):
+        with open(fixtures[i % len(fixtures)]) as f:
+            data = json.load(f)
+        game_id = str(401800000 + i)
+        boxscores[game_id] = json.dumps(data, separators=(",", ":")).encode()
+
+        athletes = [
+            athlete["athlete"]["displayName"]
+            for team in data["gamepackageJSON"]["boxscore"]["players"]
+            for stats in team["statistics"]
+            for athlete in stats["athletes"]
+            if athlete.get("stats")
+        ]
+        for n, name in enumerate(athletes):
+            # Every fifth name is misspelt to exercise fuzzy matching
+            player_name = name[:-1] if n % 5 == 4 else name
+            for stat_type in EVENT_STAT_TYPES:
+                betting_events.append({
+                    "event_id": f"{game_id}-{n}-{stat_type}",
+                    "league": NBA_LEAGUE_ID,
+                    "player_name": player_name,
+                    "stat_type": stat_type,
+                    "status": "IN_PROGRESS",
+                    "start_time": event_start,
+                })
+        # A player who never shows up in the boxscore goes down the DNP path
+        betting_events.append({
+            "event_id": f"{game_id}-dnp",
+            "league": NBA_LEAGUE_ID,
+            "player_name": f"Bench Player {game_id}",
+            "stat_type": "Points",
+            "status": "IN_PROGRESS",
+            "start_time": dnp_start,
+        })
+    return boxscores, betting_events
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--games", type=int, default=12, help="games on the replayed slate")
+    parser.add_argument("--rounds", type=int, default=20, help="full pipeline runs to time")
+    parser.add_argument("--settle", choices=["in_progress", "complete"], default="in_progress",
+                        help="settle events as live updates or as completions")
+    parser.add_argument("--warm", action="store_true",
+                        help="keep boxscore change tracking, the events cache and pushed values between rounds instead of replaying cold")
+    args = parser.parse_args()
+
+    fixtures = sorted(glob.glob(FIXTURE_PATTERN))
+    if not fixtures:
+        raise SystemExit(f"No fixtures found matching {FIXTURE_PATTERN}")
+    boxscores, betting_events = build_slate(fixtures, args.games)
+
+    stand_in = StandIn(boxscores, betting_events)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(stand_in))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    # Point every endpoint at the stand-in before the pipeline modules read their config
+    os.environ.update({
+        "ESPN_CDN_URL": f"{base_url}/core",
+        "BACKEND_URL": base_url,
+        "AUTH_SERVER_URL": base_url,
+        "HASURA_GRAPHQL_URL": f"{base_url}/v1/graphql",
+        # Keep pipeline state off disk
+        "STATE_DB_PATH": ":memory:",
+    })
+
+    import utils.s3_service as s3_service
+    from utils.leagues.nba import processor as nba_processor
+    from utils.leagues.nba.extractor import BOXSCORE_TRACKER
+    from utils.leagues.common.betting_events import ACTIVE_EVENTS_CACHE
+    from utils.leagues.common.pushed_values import PUSHED_VALUES
+    from utils.state_store import STATE_STORE
+
+    local_s3 = LocalS3()
+    s3_service.s3_uploader = s3_service.S3Uploader(s3_service=local_s3)
+
+    timer = StageTimer()
+    nba_processor.extract_game_data = timer.wrap("fetch", nba_processor.extract_game_data)
+    nba_processor.parse_players = timer.wrap("parse_players", nba_processor.parse_players)
+    nba_processor.process_player_stats = timer.wrap("process_player_stats", nba_processor.process_player_stats)
+    nba_processor.PlayerIndex.match_events = timer.wrap("name_matching", nba_processor.PlayerIndex.match_events)
+    nba_processor.calculate_stat_value = timer.wrap("calculate_stat_value", nba_processor.calculate_stat_value)
+    nba_processor.fetch_active_betting_events = timer.wrap("fetch_betting_events", nba_processor.fetch_active_betting_events)
+    nba_processor.SettlementBatch.flush = timer.wrap("settlement", nba_processor.SettlementBatch.flush)
+    nba_processor.push_betting_event_updates = timer.wrap("bulk_update", nba_processor.push_betting_event_updates)
+
+    game_ids = sorted(boxscores)
+    testing = "complete" if args.settle == "complete" else "in_progress"
+    round_times = []
+    # The pipeline prints progress for every game and event; keep the report readable
+    real_print = builtins.print
+    builtins.print = lambda *a, **k: None
+    try:
+        for _ in range(args.rounds):
+            if not args.warm:
+                BOXSCORE_TRACKER.retain([])
+                ACTIVE_EVENTS_CACHE.invalidate()
+                PUSHED_VALUES.clear()
+                STATE_STORE.clear()
+            start = time.perf_counter()
+            nba_processor.process_boxscores(game_ids, FIXTURE_NOW, testing_mode=True, testing=testing)
+            s3_service.s3_uploader.flush()
+            round_times.append(time.perf_counter() - start)
+    finally:
+        builtins.print = real_print
+        server.shutdown()
+
+    total = sum(round_times)
+    print(f"{args.games} games, {len(betting_events)} betting events, {args.rounds} rounds "
+          f"({'warm' if args.warm else 'cold'}, settle={args.settle})\n")
+    print(f"{'stage':<24}{'calls':>8}{'total ms':>11}{'p50 ms':>9}{'p99 ms':>9}")
+    for stage in ["fetch", "parse_players", "process_player_stats", "name_matching",
+                  "calculate_stat_value", "fetch_betting_events", "settlement", "bulk_update"]:
+        samples = timer.samples[stage]
+        print(f"{stage:<24}{len(samples):>8}{sum(samples) * 1000:>11.1f}"
+              f"{percentile(samples, 50) * 1000:>9.3f}{percentile(samples, 99) * 1000:>9.3f}")
+    print(f"\nround p50 {percentile(round_times, 50) * 1000:.1f}ms, p99 {percentile(round_times, 99) * 1000:.1f}ms")
+    print(f"throughput {args.games * args.rounds / total:.1f} games/s, "
+          f"{len(betting_events) * args.rounds / total:.0f} events/s")
+    print(f"stand-in requests: {dict(stand_in.requests)}, S3 objects: {len(local_s3.objects)}")
+
+
+if __name__ == "__main__":
+    main()
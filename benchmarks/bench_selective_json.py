@@ -0,0 +1,84 @@
+#!/usr/bin/env python
+"""
+Compare full json.loads against decode_gamepackage on the bundled boxscore fixtures.
+
+Run from the repo root:
+    python -m benchmarks.bench_selective_json [--repeat N]
+"""
+import argparse
+import glob
+import json
+import os
+import time
+import tracemalloc
+
+from utils.leagues.common.selective_json import decode_gamepackage, GAMEPACKAGE_SECTIONS
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIXTURE_PATTERN = os.path.join(REPO_ROOT, "game_data_*.json")
+
+
+def time_decode(decode, raw, repeat: int) -> float:
+    """Mean seconds per decode"""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        decode(raw)
+    return (time.perf_counter() - start) / repeat
+
+
+def measure_memory(decode, raw):
+    """(retained, peak) bytes allocated while decoding"""
+    tracemalloc.start()
+    result = decode(raw)
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return retained, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=200, help="decodes per fixture for timing")
+    args = parser.parse_args()
+
+    fixtures = sorted(glob.glob(FIXTURE_PATTERN))
+    if not fixtures:
+        raise SystemExit(f"No fixtures found matching {FIXTURE_PATTERN}")
+
+    print(f"{'fixture':<32}{'size':>9}{'full ms':>10}{'sel ms':>9}{'full KB':>10}{'sel KB':>9}{'peak KB':>10}{'sel peak':>10}")
+    totals = [0.0, 0.0, 0, 0]
+    for path in fixtures:
+        with open(path, "rb") as f:
+            # Served payloads are compact; re-encode so the fixture matches the wire format
+            raw = json.dumps(json.load(f), separators=(",", ":")).encode("utf-8")
+
+        full = json.loads(raw)["gamepackageJSON"]
+        selected = decode_gamepackage(raw)["gamepackageJSON"]
+        for key in GAMEPACKAGE_SECTIONS:
+            assert selected.get(key) == full.get(key), f"{path}: '{key}' differs from full decode"
+
+        full_time = time_decode(json.loads, raw, args.repeat)
+        selective_time = time_decode(decode_gamepackage, raw, args.repeat)
+        full_retained, full_peak = measure_memory(json.loads, raw)
+        selective_retained, selective_peak = measure_memory(decode_gamepackage, raw)
+
+        totals[0] += full_time
+        totals[1] += selective_time
+        totals[2] += full_retained
+        totals[3] += selective_retained
+        print(
+            f"{os.path.basename(path):<32}{len(raw) // 1024:>7}KB"
+            f"{full_time * 1000:>10.2f}{selective_time * 1000:>9.2f}"
+            f"{full_retained // 1024:>10}{selective_retained // 1024:>9}"
+            f"{full_peak // 1024:>10}{selective_peak // 1024:>10}"
+        )
+
+    print(
+        f"\nPer game: {totals[1] / len(fixtures) * 1000:.2f}ms vs {totals[0] / len(fixtures) * 1000:.2f}ms CPU "
+        f"({totals[0] / totals[1]:.1f}x), {totals[3] // len(fixtures) // 1024}KB vs "
+        f"{totals[2] // len(fixtures) // 1024}KB retained"
+    )
+
+
+if __name__ == "__main__":
+    main()
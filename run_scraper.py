@@ -1,6 +1,11 @@
 #!/usr/bin/env python
-from app import scrape_all_games
+from app import scrape_all_games, enqueue_all_games
+from utils.leagues.common.constants import POLL_INTERVAL_LIVE_SECONDS, POLL_INTERVAL_SCHEDULED_SECONDS
+from utils.leagues.common.poll_scheduler import POLL_SCHEDULER
+from utils.s3_service import flush_uploads_on_sigterm
+import argparse
 import logging
+import time
 
 # Configure logging
 logging.basicConfig(
@@ -9,10 +14,40 @@ logging.basicConfig(
 )
 logger = logging.getLogger('espn_scraper_cron')
 
-if __name__ == "__main__":
+
+def run_once(distributed=False):
     logger.info("Starting scheduled ESPN scraper job")
     try:
-        results = scrape_all_games()
+        results = enqueue_all_games() if distributed else scrape_all_games()
         logger.info(f"Scheduled scraper job completed with results: {results}")
     except Exception as e:
-        logger.error(f"Scheduled scraper job failed with error: {str(e)}") 
\ No newline at end of file
+        logger.error(f"Scheduled scraper job failed with error: {str(e)}")
+
+
+def run_forever():
+    """Keep scraping, waking up whenever the next game is due a poll"""
+    while True:
+        run_once()
+        wait = POLL_SCHEDULER.seconds_until_next_poll()
+        if wait is None:
+            wait = POLL_INTERVAL_SCHEDULED_SECONDS
+        # Never spin faster than half the live interval or sleep past the slowest one
+        wait = min(max(wait, POLL_INTERVAL_LIVE_SECONDS / 2), POLL_INTERVAL_SCHEDULED_SECONDS)
+        logger.info(f"Next scraper run in {wait:.0f} seconds")
+        time.sleep(wait)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Scrape ESPN boxscores and settle betting events")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--loop", action="store_true",
+                      help="keep running, polling each game on its own status-based schedule")
+    mode.add_argument("--distributed", action="store_true",
+                      help="enqueue the games as rq jobs for worker.py processes instead of processing them here")
+    args = parser.parse_args()
+    flush_uploads_on_sigterm()
+
+    if args.loop:
+        run_forever()
+    else:
+        run_once(args.distributed)
@@ -1,27 +1,66 @@
 import os
-import requests
+import json
+import time
+import base64
+import threading
+from utils.http_client import http_client
 from typing import Optional
 from dotenv import load_dotenv
 
 load_dotenv()
 
+# Log in again this many seconds before the cached token expires
+TOKEN_REFRESH_MARGIN_SECONDS = int(os.getenv("TOKEN_REFRESH_MARGIN_SECONDS", "60"))
+# Lifetime assumed for tokens that don't carry an exp claim
+DEFAULT_TOKEN_TTL_SECONDS = int(os.getenv("DEFAULT_TOKEN_TTL_SECONDS", "900"))
+
+
+def token_expiry(token: str) -> float:
+    """Expiry (epoch seconds) from a JWT's exp claim, or now + DEFAULT_TOKEN_TTL_SECONDS"""
+    try:
+        payload = token.split(".")[1]
+        payload += "=" * (-len(payload) % 4)
+        return float(json.loads(base64.urlsafe_b64decode(payload))["exp"])
+    except (IndexError, KeyError, TypeError, ValueError):
+        return time.time() + DEFAULT_TOKEN_TTL_SECONDS
+
+
 class AuthService:
+    # Token cache shared by every instance in the process
+    _access_token: Optional[str] = None
+    _expires_at: float = 0.0
+    _token_lock = threading.Lock()
+
     def __init__(self):
-        self.server_url = "https://graphql-middleware-0017fe3a94ee.herokuapp.com"
+        self.server_url = os.getenv("AUTH_SERVER_URL", "https://graphql-middleware-0017fe3a94ee.herokuapp.com")
         self.email = "espn@strikebet.app"
         self.password = "espn_scraper"
-        self._access_token = None
+
+    @classmethod
+    def _cached_token(cls) -> Optional[str]:
+        if cls._access_token and time.time() < cls._expires_at - TOKEN_REFRESH_MARGIN_SECONDS:
+            return cls._access_token
+        return None
 
     def get_token(self) -> Optional[str]:
-        """Get authentication token, login if necessary"""
-        if not self._access_token:
-            self._access_token = self._login()
-        return self._access_token
+        """Get authentication token, logging in again shortly before it expires"""
+        token = self._cached_token()
+        if token:
+            return token
+
+        # Only one worker logs in; the rest wait and reuse its token
+        with AuthService._token_lock:
+            token = self._cached_token()
+            if not token:
+                token = self._login()
+                AuthService._access_token = token
+                AuthService._expires_at = token_expiry(token)
+            return token
 
     def _login(self) -> Optional[str]:
         """Authenticate with the backend server"""
         try:
-            response = requests.post(
+            response = http_client.post(
                 f"{self.server_url}/auth/login",
                 json={
                     "email": self.email,
@@ -44,7 +83,7 @@ class AuthService:
     def _register(self) -> Optional[str]:
         """Register a new user with the backend server"""
         try:
-            response = requests.post(
+            response = http_client.post(
                 f"{self.server_url}/auth/register",
                 json={
                     "username": "espn_scraper",
@@ -60,3 +99,4 @@ class AuthService:
             raise Exception(f"Registration failed: {str(e)}")
 
 # Create a singleton instance
+auth_service = AuthService()
@@ -1,12 +1,13 @@
 import uuid
 from datetime import datetime, timezone
-import requests
+from utils.http_client import http_client
+from utils.leagues.common.constants import HASURA_GRAPHQL_URL
 import os
 from typing import Optional, Dict, Any
 
 class JobService:
     def __init__(self):
-        self.hasura_url = "https://lasting-scorpion-21.hasura.app/v1/graphql"
+        self.hasura_url = HASURA_GRAPHQL_URL
         self.headers = {
             "X-Hasura-Admin-Secret": "DHieJhzOpml0wBIbEZC5mvsDdSKMnyMC4b8Kx04p0adKUO0zd2e2LSganKK6CRAb",
             "Content-Type": "application/json"
@@ -34,7 +35,7 @@ mutation CreateJob($job_id: uuid!, $task_name: String!, $status: String!, $start
             "status": "pending",
             "start_time": start_time
         }
-        response = requests.post(
+        response = http_client.post(
             self.hasura_url,
             json={"query": mutation, "variables": variables},
             headers=self.headers
@@ -64,14 +65,14 @@ mutation CreateJob($job_id: uuid!, $task_name: String!, $status: String!, $start
             "end_time": end_time,
             "result": result
         }
-        response = requests.post(
+        response = http_client.post(
             self.hasura_url,
             json={"query": mutation, "variables": variables},
             headers=self.headers
         )
         response.raise_for_status()
 
-    def get_job_details(self, job_id: str) -> Dict[str, Any]:
+    def get_job_details(self, job_id: str) -> Optional[Dict[str, Any]]:
         query = """
         query GetJob($job_id: uuid!) {
           jobs_espn_by_pk(job_id: $job_id) {
@@ -84,10 +85,11 @@ mutation CreateJob($job_id: uuid!, $task_name: String!, $status: String!, $start
           }
         }
         """
-        response = requests.post(
+        response = http_client.post(
             self.hasura_url,
             json={"query": query, "variables": {"job_id": job_id}},
             headers=self.headers
         )
         response.raise_for_status()
-        return response.json()["data"]["jobs_by_pk"] 
\ No newline at end of file
+        # None when there is no such job (or the ID isn't a valid uuid)
+        return (response.json().get("data") or {}).get("jobs_espn_by_pk")
@@ -1,10 +1,16 @@
-import requests
+from utils.http_client import http_client
 import json
 import os
 from datetime import datetime, timedelta
-from typing import Set, Dict, List
+from typing import Set, Dict, List, Optional
 import pytz
-BOXSCORE_URL = "https://cdn.espn.com/core/mens-college-basketball/"
+from ..common.constants import ESPN_CDN_URL
+from ..common.change_tracker import BoxscoreChangeTracker
+from ..common.selective_json import decode_gamepackage
+BOXSCORE_URL = f"{ESPN_CDN_URL}/mens-college-basketball/"
+BOXSCORE_TRACKER = BoxscoreChangeTracker("cbb")
+# gamepackageJSON sections process_game_data reads
+BOXSCORE_SECTIONS = ("boxscore", "header")
 print(BOXSCORE_URL)
 
 def extract_players(input_data: Dict) -> List:
@@ -34,6 +40,7 @@ def parse_players(players_data):
                     active = athlete.get("active", False)
                     reason = athlete.get("reason", "")
                     jersey = athlete["athlete"].get("jersey", "")
+                    athlete_id = athlete["athlete"].get("id", "")
 
                     athlete_stats = athlete.get("stats", [])
                     player_stats_list = []
@@ -52,6 +59,7 @@ def parse_players(players_data):
                             "active": active,
                             "reason": reason,
                             "jersey": jersey,
+                            "athlete_id": athlete_id,
                         },
                         "player_statistics": player_stats_list,
                     }
@@ -59,18 +67,29 @@ def parse_players(players_data):
 
     return all_players
 
-def extract_game_data(game_id: str) -> Dict:
-    """Fetches and extracts game data for a specific game ID."""
+def extract_game_data(game_id: str) -> Optional[Dict]:
+    """
+    Fetches and extracts game data for a specific game ID.
+    Returns None when the boxscore hasn't changed since the last fetch.
+    """
     url = f"{BOXSCORE_URL}/boxscore?xhr=1&gameId={game_id}"
-    response = requests.get(url)
+    response = http_client.get(url, headers=BOXSCORE_TRACKER.conditional_headers(game_id))
+
+    if response.status_code == 304:
+        BOXSCORE_TRACKER.record_not_modified(game_id)
+        return None
 
     # with open(f"boxscore_{game_id}.json", "w") as file:
     #     json.dump(response.json(), file)
-    
+
     if response.status_code != 200:
         raise Exception(f"Failed to fetch data for gameId {game_id}: {response.status_code}")
-        
-    return response.json()
+
+    # Only boxscore and header are used; skip seasonseries/plays/news/videos/standings
+    data = decode_gamepackage(response.content, BOXSCORE_SECTIONS)
+    if not BOXSCORE_TRACKER.has_changed(game_id, data, response.headers):
+        return None
+    return data
 
 def extract_game_status(competitions: List, current_date: datetime) -> str:
     pass
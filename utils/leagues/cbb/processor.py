@@ -1,13 +1,18 @@
-from typing import Set, Dict, Optional, Union
+from typing import Set, Dict, Optional, Union, Tuple, List
 from datetime import datetime
 from collections import defaultdict
-import os
 import requests
 import logging
-from .extractor import extract_game_data, extract_players, parse_players, extract_game_status
+from .extractor import extract_game_data, extract_players, parse_players, extract_game_status, BOXSCORE_TRACKER
 from ..common.constants import STATUS_FINAL, STATUS_IN_PROGRESS, CBB_LEAGUE_ID
 from utils.s3_service import upload_to_s3
-from ..common.helpers import parse_shot_stats, BASKETBALL_STAT_MAP, get_hasura_headers
+from ..common.betting_events import fetch_active_betting_events
+from ..common.settlement import SettlementBatch
+from ..common.finalized_games import FINALIZED_GAMES, record_finalized_games
+from ..common.bulk_update import push_betting_event_updates
+from ..common.player_index import PlayerIndex, game_start_time, player_details
+from ..common.helpers import process_games_concurrently
+from ..common.stat_matrix import prop_matrix, prop_value
 import json
 import pytz
 from datetime import timedelta
@@ -45,10 +50,26 @@ def process_player_stats(player_stats: list) -> dict:
     return stats_dict
 
 
-def process_game_data(game_id: str, current_date: datetime) -> Optional[Dict]:
-    """Process individual game data and return player statistics."""
+def process_game_data(game_id: str, current_date: datetime) -> Optional[Tuple[Dict, bool]]:
+    """
+    Process individual game data and return player statistics, along with
+    whether the boxscore changed since the last poll.
+    """
     try:
+        if FINALIZED_GAMES.is_finalized("cbb", game_id):
+            # Final and fully settled; reuse what we have instead of fetching it again
+            print(f"Game already finalized, {game_id}")
+            cached = BOXSCORE_TRACKER.last_result(game_id)
+            return (cached, False) if cached is not None else None
         data = extract_game_data(game_id)
+        if data is None:
+            cached = BOXSCORE_TRACKER.last_result(game_id)
+            if cached is not None:
+                print(f"Boxscore unchanged since last poll, {game_id}")
+                return cached, False
+            # Nothing cached to reuse (the last parse failed), fetch the full boxscore again
+            BOXSCORE_TRACKER.forget(game_id)
+            data = extract_game_data(game_id)
         comeptitions = data.get("gamepackageJSON", {}).get("header", {}).get("competitions", [])[0]
 
         game_status = comeptitions.get("status", {}).get("type", {}).get("name", "")
@@ -63,86 +84,91 @@ def process_game_data(game_id: str, current_date: datetime) -> Optional[Dict]:
         parsed_players = parse_players(players_data)
         # upload_to_s3(parsed_players, f"CBB/PLAYERDATA/players_{game_id}.json")
 
-        return {
-            player["player_name"]: {**process_player_stats(player["player_statistics"]), 
-                                  "game_status": game_status}
-            for player in parsed_players
-            if player.get("player_statistics")
+        start_time = game_start_time(data)
+        with_stats = [player for player in parsed_players if player.get("player_statistics")]
+        players_stats = [process_player_stats(player["player_statistics"]) for player in with_stats]
+        # Every supported prop for every player, computed in one pass
+        game_props = prop_matrix(players_stats)
+        game_players = {
+            player["player_name"]: {**stats, 
+                                  "game_status": game_status,
+                                  **player_details(game_id, player, start_time),
+                                  "props": props}
+            for player, stats, props in zip(with_stats, players_stats, game_props)
         }
+        BOXSCORE_TRACKER.store_result(game_id, game_players)
+        return game_players, True
 
     except Exception as e:
         logger.error(f"Error processing game {game_id}: {str(e)}")
         return None
 
-def update_betting_event(event: Dict, player_stats: Dict, updated_stat: float, testing_mode: bool, testing: str) -> Optional[Dict]:
-    """Update or complete a betting event based on game status."""
-    try:
-        if (player_stats["game_status"] == STATUS_FINAL) or testing_mode and testing == "complete":
-            response = requests.post(
-                f"{os.getenv('BACKEND_URL')}/actions/complete-betting-event",
-                headers=get_hasura_headers(),
-                json={"actual_result": updated_stat, "betting_event_id": event["event_id"]}
-            )
-            response.raise_for_status()
-            print("Event completed successfully")
-            return None
-        elif (player_stats["game_status"] == STATUS_IN_PROGRESS) or (testing_mode and testing == "in_progress"):
-            return {**event, "result_numeric": str(updated_stat), "status": "IN_PROGRESS"}
-        return None
-    except requests.exceptions.RequestException as e:
-        logger.error(f"Failed to update betting event {event['event_id']}: {str(e)}")
+def update_betting_event(event: Dict, player_stats: Dict, updated_stat: float, testing_mode: bool, testing: str, settlement: SettlementBatch) -> Optional[Dict]:
+    """
+    Update a live betting event, or queue its completion on the settlement
+    batch once the game is final.
+    """
+    if (player_stats["game_status"] == STATUS_FINAL) or testing_mode and testing == "complete":
+        settlement.complete(event, updated_stat, player_stats["game_id"])
+        print("Event queued for completion")
         return None
+    elif (player_stats["game_status"] == STATUS_IN_PROGRESS) or (testing_mode and testing == "in_progress"):
+        return {**event, "result_numeric": str(updated_stat), "status": "IN_PROGRESS"}
+    return None
 
-def calculate_stat_value(stat_type: Union[str, dict, list], player_stats: Dict) -> float:
-    """Calculate the stat value based on the stat type."""
-
-    if isinstance(stat_type, list):
-        return sum(player_stats[stat] for stat in stat_type)
-    elif isinstance(stat_type, dict):
-        if stat_type.get("calculator"):
-            return stat_type["calculator"](player_stats)
-        raw_stat = player_stats[stat_type["key"]]
-        
-        return parse_shot_stats(raw_stat, stat_type["made"])
-        
-    return player_stats[stat_type]
+def calculate_stat_value(stat_type: str, player_stats: Dict) -> Optional[Union[int, float]]:
+    """Look up the stat value for an event's stat type, None if the stat type is unknown."""
+    return prop_value(player_stats["props"], stat_type)
 
-def process_boxscores(game_ids: Set[str], current_date: datetime, testing_mode: bool, testing: str) -> Dict:
-    """Process all game boxscores and update betting events."""
+def process_boxscores(game_ids: Set[str], current_date: datetime, testing_mode: bool, testing: str, betting_events: Optional[List[Dict]] = None,
+                      shared_game_ids: Optional[List[str]] = None, owned_event_ids: Optional[List[str]] = None) -> Dict:
+    """
+    Process all game boxscores and update betting events.
+    betting_events is this league's slice of the active events; fetched here if not given.
+    When run as one of several jobs (see group_games), shared_game_ids are the
+    events' candidate games other jobs fetch and owned_event_ids the events
+    this job may set DNP.
+    """
     print(f"\nProcessing CBB boxscores for {len(game_ids)} games...")
     print(f"Testing mode: {testing}")
 
     scraper_complete = False
 
-    players = {}
-    for game_id in game_ids:
+    players = PlayerIndex(CBB_LEAGUE_ID)
+    BOXSCORE_TRACKER.retain(game_ids)
+    games = process_games_concurrently(game_ids, process_game_data, current_date)
+    BOXSCORE_TRACKER.record_pass(game_id for game_id, result in games.items() if result)
+    for game_id, result in games.items():
         print(f"\nProcessing game {game_id}...")
-        game_data = process_game_data(game_id, current_date)
+        game_data = result[0] if result else None
        
         if game_data:
             print(f"Found {len(game_data)} players with stats")
-            players.update(game_data)
+            players.add_game(game_id, game_data)
         else:
             print(f"No game data found for game {game_id}")
 
-    try:
-        print("\nFetching active betting events...")
-        response = requests.get(
-            f"{os.getenv('BACKEND_URL')}/api/rest/getactivebettingevents",
-            headers=get_hasura_headers()
-        )
-        response.raise_for_status()
-        betting_events = response.json()["betting_events"]
-        print(f"Found {len(betting_events)} active betting events")
-    except requests.exceptions.RequestException as e:
-        logger.error(f"Failed to fetch active betting events: {str(e)}")
-        return players
+    logger.info(f"CBB boxscore change tracking: {BOXSCORE_TRACKER.stats()}")
+    # Players in games another job fetches are matched from their stored results
+    shared_complete = players.add_stored_games(shared_game_ids or [], BOXSCORE_TRACKER)
+
+    if betting_events is None:
+        try:
+            print("\nFetching active betting events...")
+            betting_events = fetch_active_betting_events(CBB_LEAGUE_ID)
+            print(f"Found {len(betting_events)} active betting events")
+        except requests.exceptions.RequestException as e:
+            logger.error(f"Failed to fetch active betting events: {str(e)}")
+            return players
+
+    # Match every event to a player in the games starting with it, batched per roster
+    player_matches = players.match_events(betting_events)
 
     new_betting_events = []
+    # Completions and DNPs are sent together once every event has been checked
+    settlement = SettlementBatch("CBB")
     print("\nProcessing betting events...")
     for event in betting_events:
-        if int(event["league"]) != CBB_LEAGUE_ID:
-            continue
 
         print(f"\nChecking event for {event['player_name']} - {event['stat_type']}")
         
@@ -155,23 +181,23 @@ def process_boxscores(game_ids: Set[str], current_date: datetime, testing_mode:
         # with open(f"players_{game_id}.json", "w") as file:
         #     json.dump(players, file)
 
-        if event["player_name"] not in players:
+        player = player_matches.get(event["event_id"])
+        if player and player["game_id"] not in games:
+            print(f"Player is in game {player['game_id']}, which another job settles, skipping")
+            continue
+        if not player and owned_event_ids is not None and (
+                event["event_id"] not in owned_event_ids or not shared_complete):
+            print("Player not found in this job's games, leaving any DNP to the job that owns the event")
+            continue
+        if not player:
             try:
                 event_time = datetime.fromisoformat(event["start_time"].replace('Z', '+00:00'))
                 print(f"Event time: {event_time}, utc time: {utc_time}")
                 if event_time + timedelta(hours=3) < utc_time:
                     print("Player not found in game data, categorizing them as DNP")
                     print("Event", event)
-                    print("Players", players)
-                    try:
-                        response = requests.post(
-                            f"{os.getenv('BACKEND_URL')}/actions/set-dnp",
-                            headers=get_hasura_headers(),
-                            json={"betting_event_id": event["event_id"]}
-                        )
-                        response.raise_for_status()
-                    except requests.exceptions.RequestException as e:
-                        logger.error(f"Failed to set DNP for event {event['event_id']}: {str(e)}")
+                    print(f"Players indexed: {len(players)}")
+                    settlement.set_dnp(event)
                 else:
                     print("Player not found in game data but game hasn't started, skipping")
             except (ValueError, TypeError) as e:
@@ -179,21 +205,16 @@ def process_boxscores(game_ids: Set[str], current_date: datetime, testing_mode:
                 print(f"Error parsing event time: {str(e)}")
             continue
         
-        if event["player_name"] not in players:
-            print("Player not found in game data, skipping")
-            continue
    
-        stat_type = BASKETBALL_STAT_MAP.get(event["stat_type"])
-        if not stat_type:
+        print("Calculating updated stat value...")
+        updated_stat = calculate_stat_value(event["stat_type"], player)
+        if updated_stat is None:
             print(f"Stat type {event['stat_type']} not found in BASKETBALL_STAT_MAP")
             continue
-
-        print("Calculating updated stat value...")
-        updated_stat = calculate_stat_value(stat_type, players[event["player_name"]])
         print(f"New stat value: {updated_stat}")
         
         print("Updating betting event...")
-        updated_event = update_betting_event(event, players[event["player_name"]], updated_stat, testing_mode, testing)
+        updated_event = update_betting_event(event, player, updated_stat, testing_mode, testing, settlement)
         
         if updated_event:
             new_betting_events.append(updated_event)
@@ -201,58 +222,17 @@ def process_boxscores(game_ids: Set[str], current_date: datetime, testing_mode:
             scraper_complete = True
             print("No update needed")
 
-    print(f"\nProcessed all events. {len(new_betting_events)} events to update")
-    
-    if new_betting_events:
-        try:
-            updates = []
-            for event in new_betting_events:
-                update_obj = {
-                    "where": { "event_id": { "_eq": event["event_id"] } },
-                    "_set": {
-                        "result_numeric": event["result_numeric"],
-                        "status": event["status"]
-                    }
-                }
-                updates.append(update_obj)
+    settlement_results = settlement.flush()
+    failed = [result["event_id"] for result in settlement_results if not result["success"]]
+    print(f"Settled {len(settlement_results) - len(failed)} of {len(settlement_results)} events")
+    if failed:
+        print(f"Settlement failed for events: {failed}")
+    record_finalized_games("cbb", games, player_matches, settlement_results, BOXSCORE_TRACKER)
 
-            # Prepare the GraphQL payload
-            payload = {
-                "query": """
-                    mutation updateBettingEventsMany($updates: [betting_events_updates!]!) {
-                    update_betting_events_many(updates: $updates) {
-                        affected_rows
-                        returning {
-                        event_id
-                        result_numeric
-                        status
-                        }
-                    }
-                    }
-                """,
-                "variables": {
-                    "updates": updates
-                }
-            }
-
-            # Define headers and URL (make sure environment variables are set accordingly)
-            url = f"https://lasting-scorpion-21.hasura.app/v1/graphql"
-            headers = {
-                "Content-Type": "application/json",
-                "x-hasura-admin-secret": "DHieJhzOpml0wBIbEZC5mvsDdSKMnyMC4b8Kx04p0adKUO0zd2e2LSganKK6CRAb"
-            }
+    print(f"\nProcessed all events. {len(new_betting_events)} events to update")
 
-            # Send the POST request
-            response = requests.post(url, headers=headers, json=payload)
-            if response.status_code != [200, 201]:
-                logger.error(f"Failed to bulk update betting events: {response.json()}")
-                print(f"Bulk update failed: {response.json()}")
-            else: 
-                scraper_complete = True
-        except requests.exceptions.RequestException as e:
-            logger.error(f"Failed to bulk update betting events: {str(e)}")
-            print(f"Bulk update failed: {str(e)}")
-            scraper_complete = False
+    if new_betting_events:
+        scraper_complete = push_betting_event_updates(new_betting_events, "CBB")
     return scraper_complete 
 
 
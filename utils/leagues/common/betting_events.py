@@ -0,0 +1,155 @@
+import os
+import time
+import logging
+import threading
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+import pytz
+import requests
+
+from utils.http_client import http_client
+from .constants import HASURA_GRAPHQL_URL, BETTING_EVENTS_RESYNC_SECONDS, BETTING_EVENTS_WATERMARK_COLUMN
+from .helpers import get_hasura_headers
+
+logger = logging.getLogger(__name__)
+
+# Events in any other status are settled and dropped from the cache
+ACTIVE_EVENT_STATUSES = ("NOT_STARTED", "IN_PROGRESS")
+
+# Fields the processors read; queried on every delta alongside whatever the full fetch returned
+BETTING_EVENT_FIELDS = (
+    "event_id", "league", "player_name", "stat_type", "status",
+    "start_time", "in_progress", "result_numeric",
+)
+
+# The delta window starts this far before the previous poll to absorb clock skew
+WATERMARK_OVERLAP = timedelta(seconds=30)
+
+DELTA_QUERY = """
+    query activeBettingEventsDelta($since: timestamptz!) {
+    betting_events(where: { %s: { _gte: $since } }) {
+        %s
+    }
+    }
+"""
+
+
+def partition_by_league(betting_events: List[Dict]) -> Dict[int, List[Dict]]:
+    """Group betting events into per-league buckets keyed by league ID"""
+    by_league = defaultdict(list)
+    for event in betting_events:
+        by_league[int(event["league"])].append(event)
+    return dict(by_league)
+
+
+def fetch_all_active_betting_events() -> List[Dict]:
+    """
+    Download the whole active book from the backend.
+    Raises requests.exceptions.RequestException if the request fails.
+    """
+    response = http_client.get(
+        f"{os.getenv('BACKEND_URL')}/api/rest/getactivebettingevents",
+        headers=get_hasura_headers()
+    )
+    response.raise_for_status()
+    return response.json()["betting_events"]
+
+
+class ActiveEventsCache:
+    """
+    Local copy of the active betting events kept current with delta queries.
+
+    The first poll (and one every resync_seconds after that) downloads the
+    whole book. Polls in between ask Hasura only for events whose watermark
+    column moved since the previous poll, merge them into the cache and evict
+    any that are no longer active.
+    """
+
+    def __init__(self, resync_seconds: float = BETTING_EVENTS_RESYNC_SECONDS,
+                 watermark_column: str = BETTING_EVENTS_WATERMARK_COLUMN):
+        self.resync_seconds = resync_seconds
+        self.watermark_column = watermark_column
+        self._events: Dict[str, Dict] = {}
+        self._fields = set(BETTING_EVENT_FIELDS)
+        self._watermark: Optional[datetime] = None
+        self._synced_at = 0.0
+        self._lock = threading.Lock()
+        self.stats = {"full": 0, "delta": 0, "changed": 0, "evicted": 0}
+
+    def _full_sync(self, polled_at: datetime) -> None:
+        betting_events = fetch_all_active_betting_events()
+        self._events = {event["event_id"]: event for event in betting_events}
+        for event in betting_events:
+            self._fields.update(key for key, value in event.items() if not isinstance(value, (dict, list)))
+        self._watermark = polled_at
+        self._synced_at = time.monotonic()
+        self.stats["full"] += 1
+
+    def _delta_sync(self, polled_at: datetime) -> None:
+        payload = {
+            "query": DELTA_QUERY % (self.watermark_column, "\n        ".join(sorted(self._fields))),
+            "variables": {"since": (self._watermark - WATERMARK_OVERLAP).isoformat()}
+        }
+        response = http_client.post(HASURA_GRAPHQL_URL, headers=get_hasura_headers(), json=payload)
+        response.raise_for_status()
+        body = response.json()
+        if body.get("errors"):
+            raise requests.exceptions.RequestException(f"Delta query failed: {body['errors']}")
+
+        changed = body["data"]["betting_events"]
+        for event in changed:
+            if event.get("status") in ACTIVE_EVENT_STATUSES:
+                self._events[event["event_id"]] = {**self._events.get(event["event_id"], {}), **event}
+            elif self._events.pop(event["event_id"], None) is not None:
+                self.stats["evicted"] += 1
+        self._watermark = polled_at
+        self.stats["delta"] += 1
+        self.stats["changed"] += len(changed)
+
+    def refresh(self) -> List[Dict]:
+        """
+        Bring the cache up to date and return every active event.
+        Falls back to a full download if the delta query fails; raises
+        requests.exceptions.RequestException if that fails too.
+        """
+        with self._lock:
+            polled_at = datetime.now(pytz.UTC)
+            if self._watermark is None or time.monotonic() - self._synced_at >= self.resync_seconds:
+                self._full_sync(polled_at)
+            else:
+                try:
+                    self._delta_sync(polled_at)
+                except (requests.exceptions.RequestException, KeyError, TypeError) as e:
+                    logger.warning(f"Betting events delta failed, re-fetching all: {str(e)}")
+                    self._full_sync(polled_at)
+            return list(self._events.values())
+
+    def evict(self, event_id: str) -> None:
+        """Drop an event settled by this process without waiting for the next delta"""
+        with self._lock:
+            if self._events.pop(event_id, None) is not None:
+                self.stats["evicted"] += 1
+
+    def invalidate(self) -> None:
+        """Force the next refresh to download the whole book"""
+        with self._lock:
+            self._events = {}
+            self._watermark = None
+
+
+# Create a singleton instance
+ACTIVE_EVENTS_CACHE = ActiveEventsCache()
+
+
+def fetch_active_betting_events(league_id: Optional[int] = None) -> List[Dict]:
+    """
+    Active betting events from the local cache, refreshed with a delta query,
+    optionally only one league's.
+    Raises requests.exceptions.RequestException if the backend can't be reached.
+    """
+    betting_events = ACTIVE_EVENTS_CACHE.refresh()
+    if league_id is None:
+        return betting_events
+    return partition_by_league(betting_events).get(league_id, [])
@@ -0,0 +1,84 @@
+import time
+import logging
+from typing import Dict, List
+
+import requests
+
+from utils.http_client import http_client
+from .constants import HASURA_GRAPHQL_URL, BULK_UPDATE_BATCH_SIZE
+from .pushed_values import PUSHED_VALUES
+
+logger = logging.getLogger(__name__)
+
+UPDATE_BETTING_EVENTS_MANY = """
+    mutation updateBettingEventsMany($updates: [betting_events_updates!]!) {
+    update_betting_events_many(updates: $updates) {
+        affected_rows
+        returning {
+        event_id
+        result_numeric
+        status
+        }
+    }
+    }
+"""
+
+
+def build_updates(betting_events: List[Dict]) -> List[Dict]:
+    """update_betting_events_many arguments setting each event's live value"""
+    return [
+        {
+            "where": {"event_id": {"_eq": event["event_id"]}},
+            "_set": {
+                "result_numeric": event["result_numeric"],
+                "status": event["status"]
+            }
+        }
+        for event in betting_events
+    ]
+
+
+def push_betting_event_updates(betting_events: List[Dict], league: str,
+                               batch_size: int = BULK_UPDATE_BATCH_SIZE) -> bool:
+    """
+    Write live betting event values to Hasura with update_betting_events_many.
+
+    Events whose value was already pushed are left out, the rest are sent in
+    chunks of batch_size, and each chunk's values are recorded once it is
+    written. Returns False if any chunk failed.
+    """
+    changed_events = PUSHED_VALUES.changed(betting_events)
+    print(f"{len(changed_events)} of {len(betting_events)} {league} events changed since the last push")
+    if not changed_events:
+        return True
+
+    headers = {
+        "Content-Type": "application/json",
+        "x-hasura-admin-secret": "DHieJhzOpml0wBIbEZC5mvsDdSKMnyMC4b8Kx04p0adKUO0zd2e2LSganKK6CRAb"
+    }
+    success = True
+    for start in range(0, len(changed_events), batch_size):
+        chunk = changed_events[start:start + batch_size]
+        payload = {
+            "query": UPDATE_BETTING_EVENTS_MANY,
+            "variables": {"updates": build_updates(chunk)}
+        }
+        started = time.perf_counter()
+        try:
+            response = http_client.post(HASURA_GRAPHQL_URL, headers=headers, json=payload)
+            body = response.json()
+        except (requests.exceptions.RequestException, ValueError) as e:
+            logger.error(f"Failed to bulk update {league} betting events: {str(e)}")
+            success = False
+            continue
+        elapsed_ms = (time.perf_counter() - started) * 1000
+
+        if response.status_code not in [200, 201] or body.get("errors"):
+            logger.error(f"Failed to bulk update {league} betting events: {body}")
+            success = False
+            continue
+
+        affected_rows = sum(result.get("affected_rows", 0) for result in body["data"]["update_betting_events_many"])
+        logger.info(f"{league} bulk update: {len(chunk)} events, {affected_rows} rows affected in {elapsed_ms:.0f}ms")
+        PUSHED_VALUES.record(chunk)
+    return success
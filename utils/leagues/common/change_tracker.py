@@ -0,0 +1,176 @@
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+from typing import Any, Dict, Iterable, Mapping, Optional
+
+from utils.state_store import STATE_STORE, StateStore
+
+logger = logging.getLogger(__name__)
+
+
+def boxscore_fingerprint(data: Dict) -> str:
+    """
+    Hash every part of a boxscore the parsed (and cached) result is built from.
+
+    That is the player stat lines, the game status and start time, and the
+    season series event statuses NBA takes its game status from, so a game
+    going final without a stat change still counts as a change.
+    """
+    gamepackage = data.get("gamepackageJSON", {})
+    competitions = gamepackage.get("header", {}).get("competitions") or [{}]
+    section = {
+        "players": gamepackage.get("boxscore", {}).get("players", []),
+        "status": competitions[0].get("status", {}),
+        "date": competitions[0].get("date"),
+        "seasonseries": [
+            [(event.get("date"), event.get("statusType", {})) for event in series.get("events", [])]
+            for series in gamepackage.get("seasonseries") or []
+            if isinstance(series, dict)
+        ],
+    }
+    encoded = json.dumps(section, sort_keys=True, separators=(",", ":")).encode("utf-8")
+    return hashlib.sha1(encoded).hexdigest()
+
+
+class BoxscoreChangeTracker:
+    """
+    Remembers what each game's boxscore looked like on the last poll.
+
+    Every parsed result is also written to the state store with its
+    fingerprint and validators, and a game missing from memory (after a
+    restart, or in a fresh rq work-horse) is loaded from there on first use.
+    Store failures (e.g. "database is locked") are logged and otherwise
+    ignored, so persistence problems never fail a game's processing.
+    """
+
+    def __init__(self, league: str, store: Optional[StateStore] = STATE_STORE):
+        self.league = league
+        self.store = store
+        self.hits = 0
+        self.misses = 0
+        self._validators: Dict[str, Dict[str, str]] = {}
+        self._fingerprints: Dict[str, str] = {}
+        self._results: Dict[str, Any] = {}
+        self._loaded = set()
+        self._last_pass: set = set()
+        self._lock = threading.Lock()
+
+    def _ensure_loaded(self, game_id: str) -> None:
+        # Called with the lock held
+        if game_id in self._loaded:
+            return
+        self._loaded.add(game_id)
+        if self.store is None:
+            return
+        try:
+            snapshot = self.store.load_snapshot(self.league, game_id)
+        except (sqlite3.Error, ValueError) as e:
+            logger.warning(f"Could not load {self.league.upper()} snapshot for game {game_id}: {str(e)}")
+            return
+        if snapshot is None:
+            return
+        self._validators.setdefault(game_id, snapshot["validators"])
+        if snapshot["fingerprint"]:
+            self._fingerprints.setdefault(game_id, snapshot["fingerprint"])
+        if snapshot["result"] is not None:
+            self._results.setdefault(game_id, snapshot["result"])
+
+    def conditional_headers(self, game_id: str) -> Dict[str, str]:
+        """Headers for a conditional GET based on the last response's ETag/Last-Modified"""
+        with self._lock:
+            self._ensure_loaded(game_id)
+            return dict(self._validators.get(game_id, {}))
+
+    def record_not_modified(self, game_id: str) -> None:
+        """Count a 304 response as a hit"""
+        with self._lock:
+            self.hits += 1
+
+    def has_changed(self, game_id: str, data: Dict, response_headers: Optional[Mapping[str, str]] = None) -> bool:
+        """
+        Store the response validators and fingerprint for game_id and report
+        whether the boxscore differs from the last one seen.
+        """
+        fingerprint = boxscore_fingerprint(data)
+        validators = {}
+        if response_headers:
+            if response_headers.get("ETag"):
+                validators["If-None-Match"] = response_headers["ETag"]
+            if response_headers.get("Last-Modified"):
+                validators["If-Modified-Since"] = response_headers["Last-Modified"]
+
+        with self._lock:
+            self._ensure_loaded(game_id)
+            self._validators[game_id] = validators
+            changed = self._fingerprints.get(game_id) != fingerprint
+            self._fingerprints[game_id] = fingerprint
+            if changed:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return changed
+
+    def store_result(self, game_id: str, result: Any) -> None:
+        """Keep the processed output for game_id to reuse while it is unchanged"""
+        with self._lock:
+            self._results[game_id] = result
+            fingerprint = self._fingerprints.get(game_id)
+            validators = self._validators.get(game_id, {})
+        if self.store:
+            try:
+                self.store.save_snapshot(self.league, game_id, fingerprint, validators, result)
+            except sqlite3.Error as e:
+                logger.warning(f"Could not save {self.league.upper()} snapshot for game {game_id}: {str(e)}")
+
+    def fingerprint(self, game_id: str) -> Optional[str]:
+        """Fingerprint of the last boxscore seen for game_id"""
+        with self._lock:
+            self._ensure_loaded(game_id)
+            return self._fingerprints.get(game_id)
+
+    def last_result(self, game_id: str) -> Optional[Any]:
+        with self._lock:
+            self._ensure_loaded(game_id)
+            return self._results.get(game_id)
+
+    def forget(self, game_id: str) -> None:
+        """Drop everything known about game_id so the next fetch is a full one"""
+        with self._lock:
+            self._loaded.add(game_id)
+            self._validators.pop(game_id, None)
+            self._fingerprints.pop(game_id, None)
+            self._results.pop(game_id, None)
+        if self.store:
+            try:
+                self.store.delete_snapshot(self.league, game_id)
+            except sqlite3.Error as e:
+                logger.warning(f"Could not delete {self.league.upper()} snapshot for game {game_id}: {str(e)}")
+
+    def retain(self, game_ids: Iterable[str]) -> None:
+        """
+        Drop games that aren't being polled from memory; their snapshots stay
+        in the state store until compaction.
+        """
+        keep = set(game_ids)
+        with self._lock:
+            for game_id in (set(self._fingerprints) | set(self._results) | self._loaded) - keep:
+                self._loaded.discard(game_id)
+                self._validators.pop(game_id, None)
+                self._fingerprints.pop(game_id, None)
+                self._results.pop(game_id, None)
+
+    def record_pass(self, game_ids: Iterable[str]) -> None:
+        """Note the games that produced a result in the latest processing pass"""
+        with self._lock:
+            self._last_pass = set(game_ids)
+
+    def last_pass(self) -> set:
+        """Games that produced a result in the latest processing pass"""
+        with self._lock:
+            return set(self._last_pass)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "tracked_games": len(self._fingerprints)}
@@ -3,6 +3,8 @@ import os
 
 # Base URLs
 ESPN_BASE_URL = "https://site.web.api.espn.com/apis/site/v2/sports"
+ESPN_CDN_URL = os.getenv("ESPN_CDN_URL", "https://cdn.espn.com/core")
+HASURA_GRAPHQL_URL = os.getenv("HASURA_GRAPHQL_URL", "https://lasting-scorpion-21.hasura.app/v1/graphql")
 ESPN_PARAMS = "region=us&lang=en&contentorigin=espn&calendartype=offdays&includeModules=videos"
 
 # Status constants
@@ -23,4 +25,37 @@ NBA_LEAGUE_ID = 7
 TENNIS_LEAGUE_ID = 5
 UFC_LEAGUE_ID = 12
 SOCCER_LEAGUE_ID = 82
-CBB_LEAGUE_ID = 20
\ No newline at end of file
+CBB_LEAGUE_ID = 20
+
+# Maximum number of boxscores fetched/parsed at the same time per league
+BOXSCORE_FETCH_CONCURRENCY = int(os.getenv("BOXSCORE_FETCH_CONCURRENCY", "8"))
+
+# How long a league/date scoreboard lookup is reused before ESPN is asked again
+SCOREBOARD_CACHE_TTL_SECONDS = int(os.getenv("SCOREBOARD_CACHE_TTL_SECONDS", "3600"))
+
+# Schedule index: days of games indexed ahead of today and how often it is rebuilt
+SCHEDULE_LOOKAHEAD_DAYS = int(os.getenv("SCHEDULE_LOOKAHEAD_DAYS", "30"))
+SCHEDULE_REFRESH_SECONDS = int(os.getenv("SCHEDULE_REFRESH_SECONDS", "3600"))
+
+# Active betting events cache: how often the whole book is re-fetched instead of
+# only events changed since the last poll, and the column the delta query filters on
+BETTING_EVENTS_RESYNC_SECONDS = int(os.getenv("BETTING_EVENTS_RESYNC_SECONDS", "900"))
+BETTING_EVENTS_WATERMARK_COLUMN = os.getenv("BETTING_EVENTS_WATERMARK_COLUMN", "updated_at")
+
+# Maximum number of complete-betting-event / set-dnp actions in flight at once
+SETTLEMENT_CONCURRENCY = int(os.getenv("SETTLEMENT_CONCURRENCY", "8"))
+
+# Most betting event updates sent in one update_betting_events_many mutation
+BULK_UPDATE_BATCH_SIZE = int(os.getenv("BULK_UPDATE_BATCH_SIZE", "100"))
+
+# Per-game poll intervals by game status; games in any other live status use the live interval
+POLL_INTERVAL_LIVE_SECONDS = int(os.getenv("POLL_INTERVAL_LIVE_SECONDS", "30"))
+POLL_INTERVAL_HALFTIME_SECONDS = int(os.getenv("POLL_INTERVAL_HALFTIME_SECONDS", "300"))
+POLL_INTERVAL_SCHEDULED_SECONDS = int(os.getenv("POLL_INTERVAL_SCHEDULED_SECONDS", "900"))
+
+# Games handed to each rq job when scraping is fanned out to workers
+GAMES_PER_JOB = int(os.getenv("GAMES_PER_JOB", "4"))
+
+# Games that went final with every event settled are skipped until this long after
+# they were finalized
+FINALIZED_GAME_TTL_SECONDS = int(os.getenv("FINALIZED_GAME_TTL_SECONDS", str(3 * 24 * 3600)))
@@ -0,0 +1,72 @@
+from typing import Dict, List, Optional, Set
+
+from .betting_events import ACTIVE_EVENT_STATUSES
+from .player_index import GAME_START_TOLERANCE, parse_start_time
+
+
+def games_for_event(games: List[Dict], event: Dict) -> List[str]:
+    """
+    IDs of the scoreboard games a betting event can belong to: those starting
+    within GAME_START_TOLERANCE of the event (betting events carry no team).
+    """
+    start = parse_start_time(event.get("start_time"))
+    if start is None:
+        return []
+    return [game["game_id"] for game in games if abs(game["start_time"] - start) <= GAME_START_TOLERANCE]
+
+
+def games_with_open_events(games: List[Dict], betting_events: List[Dict]) -> Set[str]:
+    """IDs of the games (from scrape_game_schedule) that at least one open betting event maps to"""
+    game_ids = set()
+    for event in betting_events:
+        if event.get("status") in ACTIVE_EVENT_STATUSES:
+            game_ids.update(games_for_event(games, event))
+    return game_ids
+
+
+def group_games(games: List[Dict], betting_events: List[Dict], max_group_size: int,
+                slate: Optional[List[Dict]] = None) -> List[Dict]:
+    """
+    Split the games to fetch into groups of at most max_group_size, in start
+    time order, that can be processed as separate jobs.
+
+    Each event goes to every group holding one of the games it could belong
+    to (any game in slate, which defaults to games, for an event that maps
+    to none). A group also gets the IDs of the event's other candidate games
+    so it can match players against their last stored results, and only
+    settles events whose player is in one of its own games. The group with
+    the event's nearest game owns it: only that job may set it DNP.
+
+    Returns:
+        list: one {"game_ids", "betting_events", "shared_game_ids",
+              "owned_event_ids"} per group
+    """
+    slate = games if slate is None else slate
+    ordered = sorted(games, key=lambda game: (game["start_time"], game["game_id"]))
+    groups = [
+        {"game_ids": [game["game_id"] for game in ordered[start:start + max_group_size]],
+         "betting_events": [], "shared_game_ids": set(), "owned_event_ids": []}
+        for start in range(0, len(ordered), max(1, max_group_size))
+    ]
+    group_of = {game_id: group for group in groups for game_id in group["game_ids"]}
+    start_times = {game["game_id"]: game["start_time"] for game in slate}
+    start_times.update({game["game_id"]: game["start_time"] for game in games})
+
+    for event in betting_events:
+        candidates = games_for_event(slate, event) or list(start_times)
+        fetched = [game_id for game_id in candidates if game_id in group_of]
+        if not fetched:
+            continue
+        event_start = parse_start_time(event.get("start_time"))
+        owner = min(
+            fetched,
+            key=lambda game_id: (abs(start_times[game_id] - event_start) if event_start else 0, game_id)
+        )
+        for group in {id(group_of[game_id]): group_of[game_id] for game_id in fetched}.values():
+            group["betting_events"].append(event)
+            group["shared_game_ids"].update(game_id for game_id in candidates if game_id not in group["game_ids"])
+        group_of[owner]["owned_event_ids"].append(event["event_id"])
+
+    for group in groups:
+        group["shared_game_ids"] = sorted(group["shared_game_ids"])
+    return groups
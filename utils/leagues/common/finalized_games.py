@@ -0,0 +1,115 @@
+import os
+import time
+import logging
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from utils.state_store import STATE_STORE, StateStore
+from .constants import STATUS_FINAL, FINALIZED_GAME_TTL_SECONDS
+
+logger = logging.getLogger(__name__)
+
+
+class FinalizedGames:
+    """
+    Games that went final with every one of their betting events settled.
+
+    Processors skip fetching these until the entry expires after ttl_seconds
+    or is released by hand (e.g. to pick up an ESPN stat correction). Each
+    entry keeps the final status and the fingerprint of the final boxscore.
+    Entries live in the state store, loaded once per process.
+    """
+
+    def __init__(self, store: Optional[StateStore] = STATE_STORE, ttl_seconds: float = FINALIZED_GAME_TTL_SECONDS):
+        self.store = store
+        self.ttl_seconds = ttl_seconds
+        self._games: Dict[Tuple[str, str], Dict] = {}
+        self._loaded_pid = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(league: str, game_id: str) -> Tuple[str, str]:
+        return league.lower(), str(game_id)
+
+    def _ensure_loaded(self) -> None:
+        # Called with the lock held
+        if self._loaded_pid == os.getpid():
+            return
+        self._loaded_pid = os.getpid()
+        self._games = self.store.load_finalized_games() if self.store else {}
+
+    def is_finalized(self, league: str, game_id: str) -> bool:
+        with self._lock:
+            self._ensure_loaded()
+            entry = self._games.get(self._key(league, game_id))
+            return entry is not None and entry["expires_at"] > time.time()
+
+    def get(self, league: str, game_id: str) -> Optional[Dict]:
+        """A finalized game's {"status", "stat_hash", "finalized_at", "expires_at"}"""
+        with self._lock:
+            self._ensure_loaded()
+            entry = self._games.get(self._key(league, game_id))
+            return dict(entry) if entry else None
+
+    def finalize(self, league: str, game_id: str, status: str, stat_hash: Optional[str]) -> None:
+        now = time.time()
+        key = self._key(league, game_id)
+        entry = {
+            "status": status,
+            "stat_hash": stat_hash,
+            "finalized_at": now,
+            "expires_at": now + self.ttl_seconds,
+        }
+        with self._lock:
+            self._ensure_loaded()
+            self._games[key] = entry
+        if self.store:
+            self.store.save_finalized_game(*key, entry)
+
+    def release(self, league: str, game_id: str) -> bool:
+        """Manual override: let a finalized game be fetched and settled again"""
+        key = self._key(league, game_id)
+        with self._lock:
+            self._ensure_loaded()
+            released = self._games.pop(key, None) is not None
+        if self.store:
+            self.store.delete_finalized_game(*key)
+        if released:
+            logger.info(f"Released finalized {league.upper()} game {game_id} for re-settlement")
+        return released
+
+
+# Create a singleton instance
+FINALIZED_GAMES = FinalizedGames()
+
+
+def record_finalized_games(league: str, games: Dict[str, Optional[Tuple[Dict, bool]]],
+                           player_matches: Dict[str, Optional[Dict]],
+                           settlement_results: Iterable[Dict], tracker) -> List[str]:
+    """
+    After a processing pass, register the games that are final and had no
+    settlement failures among the events matched to their players.
+
+    Args:
+        games: game_id -> process_game_data result from the pass
+        player_matches: event_id -> matched player (carrying its game_id)
+        settlement_results: SettlementBatch.flush() results from the pass
+        tracker: the league's BoxscoreChangeTracker, for the final fingerprint
+    """
+    unsettled = set()
+    for result in settlement_results:
+        player = player_matches.get(result["event_id"])
+        if not result["success"] and player:
+            unsettled.add(player["game_id"])
+
+    finalized = []
+    for game_id, result in games.items():
+        if not result or game_id in unsettled or FINALIZED_GAMES.is_finalized(league, game_id):
+            continue
+        game_players = result[0]
+        if game_players and all(player["game_status"] == STATUS_FINAL for player in game_players.values()):
+            FINALIZED_GAMES.finalize(league, game_id, STATUS_FINAL, tracker.fingerprint(game_id))
+            finalized.append(game_id)
+    if finalized:
+        logger.info(f"{league.upper()} games finalized: {finalized}")
+    return finalized
@@ -1,7 +1,12 @@
 from datetime import datetime, timedelta
-from typing import Dict
+from typing import Dict, Callable, Iterable, Any
+from concurrent.futures import ThreadPoolExecutor
 import os
-from utils.auth_service import AuthService
+import logging
+from utils.auth_service import auth_service
+from .constants import BOXSCORE_FETCH_CONCURRENCY
+
+logger = logging.getLogger(__name__)
 
 def format_date(date: datetime) -> str:
     """Format date to YYYYMMDD for ESPN API."""
@@ -15,12 +20,41 @@ def find_next_game_date(current_date: datetime, max_days: int = 14) -> datetime:
         yield next_date
 
 
+def process_games_concurrently(
+    game_ids: Iterable[str],
+    process_game: Callable[..., Any],
+    *args,
+    max_workers: int = BOXSCORE_FETCH_CONCURRENCY,
+) -> Dict[str, Any]:
+    """
+    Run process_game(game_id, *args) for every game on a thread pool.
+
+    Boxscore fetches are network bound, so running them side by side makes a
+    slate cost roughly its slowest game instead of the sum of all of them.
+    Results are returned in the same order as game_ids. A game that raises is
+    logged and maps to None, the same as a game that returned no data.
+    """
+    game_ids = list(game_ids)
+    if not game_ids:
+        return {}
+
+    results = {}
+    workers = max(1, min(max_workers, len(game_ids)))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="boxscore") as executor:
+        futures = {game_id: executor.submit(process_game, game_id, *args) for game_id in game_ids}
+        for game_id, future in futures.items():
+            try:
+                results[game_id] = future.result()
+            except Exception as e:
+                logger.error(f"Error processing game {game_id}: {str(e)}")
+                results[game_id] = None
+    return results
+
 
 def get_hasura_headers():
-    # Replace this with however you generate or fetch your headers
-    print("Auth service token", AuthService().get_token())
+    # The token is cached process-wide, so this only logs in when it is about to expire
     return {
-        "Authorization": f"Bearer {AuthService().get_token()}",
+        "Authorization": f"Bearer {auth_service.get_token()}",
         "Content-Type": "application/json",
         "x-hasura-admin-secret": "DHieJhzOpml0wBIbEZC5mvsDdSKMnyMC4b8Kx04p0adKUO0zd2e2LSganKK6CRAb"
     }
@@ -159,4 +193,58 @@ NFL_STAT_MAP = {
 
     # Fantasy
     "Fantasy Score": "fantasyScore"
-}
\ No newline at end of file
+}
+
+
+StatAccessor = Callable[[Dict], float]
+
+
+def _nfl_key_accessor(key: str) -> StatAccessor:
+    return lambda player_stats: float(player_stats.get(key, 0))
+
+
+def _nfl_sum_accessor(keys: tuple) -> StatAccessor:
+    return lambda player_stats: sum(float(player_stats.get(key, 0)) for key in keys)
+
+
+def _nfl_ratio_accessor(numerator: str, denominator: str) -> StatAccessor:
+    # Counts the numerator only when there were attempts (e.g. "completions/passingAttempts")
+    return lambda player_stats: float(player_stats.get(numerator, 0)) if float(player_stats.get(denominator, 0)) != 0 else 0
+
+
+def compile_nfl_stat(spec: str) -> StatAccessor:
+    """
+    Turn one NFL_STAT_MAP entry ("key", "a+b" or "a/b") into a function of a
+    player's stats. Raises ValueError for malformed entries.
+    """
+    if not isinstance(spec, str) or not spec:
+        raise ValueError(f"unsupported stat spec {spec!r}")
+    if "+" in spec and "/" not in spec:
+        keys = tuple(spec.split("+"))
+        if all(keys):
+            return _nfl_sum_accessor(keys)
+    elif "/" in spec and "+" not in spec:
+        parts = spec.split("/")
+        if len(parts) == 2 and all(parts):
+            return _nfl_ratio_accessor(*parts)
+    elif "+" not in spec and "/" not in spec:
+        return _nfl_key_accessor(spec)
+    raise ValueError(f"unsupported stat spec {spec!r}")
+
+
+def compile_stat_map(stat_map: Dict, compile_stat: Callable[..., StatAccessor], league: str) -> Dict[str, StatAccessor]:
+    """
+    Compile every stat type in stat_map once, so evaluating an event is a
+    dict lookup and a call. Entries that don't compile are logged and left
+    out, and events of that stat type are skipped like any unknown one.
+    """
+    accessors = {}
+    for stat_type, spec in stat_map.items():
+        try:
+            accessors[stat_type] = compile_stat(spec)
+        except ValueError as e:
+            logger.warning(f"Skipping {league} stat type {stat_type!r}: {str(e)}")
+    return accessors
+
+
+NFL_STAT_ACCESSORS = compile_stat_map(NFL_STAT_MAP, compile_nfl_stat, "NFL")
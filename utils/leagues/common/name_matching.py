@@ -0,0 +1,59 @@
+from typing import Dict, Iterable, Optional
+
+from rapidfuzz import fuzz, process
+from rapidfuzz.utils import default_process
+from unidecode import unidecode
+
+# Minimum WRatio score (0-100) for a fuzzy match to be used
+FUZZY_MATCH_THRESHOLD = 85
+
+
+def normalize_name(name: str) -> str:
+    """Strip accents, case and punctuation so names compare on their letters only"""
+    return default_process(unidecode(name))
+
+
+def match_player_names(
+    event_names: Iterable[str],
+    player_names: Iterable[str],
+    threshold: int = FUZZY_MATCH_THRESHOLD,
+) -> Dict[str, Optional[str]]:
+    """
+    Match betting-event player names to roster names from the boxscores.
+
+    The roster is normalized once, exact matches are resolved with a dict
+    lookup and every remaining name is scored against the whole roster in a
+    single batched rapidfuzz call.
+
+    Returns:
+        dict: event name -> matched roster name, or None below threshold
+    """
+    roster = {}
+    for player_name in player_names:
+        roster.setdefault(normalize_name(player_name), player_name)
+
+    matches: Dict[str, Optional[str]] = {}
+    unmatched = {}
+    for event_name in set(event_names):
+        normalized = normalize_name(event_name)
+        if normalized in roster:
+            matches[event_name] = roster[normalized]
+        else:
+            unmatched[event_name] = normalized
+
+    if unmatched and roster:
+        choices = list(roster)
+        scores = process.cdist(
+            list(unmatched.values()),
+            choices,
+            scorer=fuzz.WRatio,
+            score_cutoff=threshold,
+            workers=-1,
+        )
+        for event_name, row in zip(unmatched, scores):
+            best = int(row.argmax())
+            matches[event_name] = roster[choices[best]] if row[best] >= threshold else None
+    else:
+        matches.update({event_name: None for event_name in unmatched})
+
+    return matches
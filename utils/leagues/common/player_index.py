@@ -0,0 +1,177 @@
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from utils.state_store import STATE_STORE
+from .name_matching import match_player_names, normalize_name
+
+# A betting event is scoped to games that start within this window of its start_time
+GAME_START_TOLERANCE = timedelta(minutes=30)
+
+
+def parse_start_time(value: Optional[str]) -> Optional[datetime]:
+    """Parse an ESPN/backend ISO timestamp ("2025-03-11T23:00Z"), None if missing or malformed"""
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except (ValueError, TypeError):
+        return None
+
+
+def game_start_time(data: Dict) -> Optional[str]:
+    """Scheduled start of the game a boxscore belongs to"""
+    competitions = data.get("gamepackageJSON", {}).get("header", {}).get("competitions") or [{}]
+    return competitions[0].get("date")
+
+
+def player_details(game_id: str, player: Dict, start_time: Optional[str]) -> Dict:
+    """Keys a parsed player is indexed by, stored alongside their stats"""
+    return {
+        "game_id": game_id,
+        "team": player.get("team", ""),
+        "start_time": start_time,
+    }
+
+
+class PlayerIndex:
+    """
+    A league slate's players indexed by game.
+
+    Players are stored per game, so two players with the same name in
+    different games no longer overwrite each other, and betting events are
+    matched against the rosters of the games starting with them rather than
+    the whole slate. (Betting events carry no team or athlete ID, so start
+    time is all there is to narrow by.)
+    """
+
+    def __init__(self, league_id: int):
+        self.league_id = league_id
+        self.players: List[Dict] = []
+        self.by_game: Dict[str, List[Dict]] = defaultdict(list)
+        self.game_starts: Dict[str, datetime] = {}
+
+    def add_game(self, game_id: str, game_players: Dict[str, Dict]) -> None:
+        """Index one game's {player_name: stats} from process_game_data"""
+        for player_name, stats in game_players.items():
+            player = {**stats, "player_name": player_name}
+            self.players.append(player)
+            self.by_game[game_id].append(player)
+            start = parse_start_time(player.get("start_time"))
+            if start and game_id not in self.game_starts:
+                self.game_starts[game_id] = start
+
+    def add_stored_games(self, game_ids: Iterable[str], tracker) -> bool:
+        """
+        Index games processed elsewhere (by another job) from their last
+        results in tracker's state store. Returns False if any of them has no
+        stored result yet.
+        """
+        complete = True
+        for game_id in game_ids:
+            game_players = tracker.last_result(game_id)
+            if game_players is None:
+                complete = False
+            else:
+                self.add_game(game_id, game_players)
+        return complete
+
+    def __len__(self) -> int:
+        return len(self.players)
+
+    def games_starting_near(self, start_time: Optional[str]) -> List[str]:
+        start = parse_start_time(start_time)
+        if start is None:
+            return []
+        return [
+            game_id for game_id, game_start in self.game_starts.items()
+            if abs(game_start - start) <= GAME_START_TOLERANCE
+        ]
+
+    def roster_for_event(self, event: Dict) -> Tuple[Tuple, List[Dict]]:
+        """
+        Narrow the players an event could refer to: those in the games
+        starting with the event. Falls back to the whole slate. Returns a
+        hashable scope key and the roster.
+        """
+        game_ids = self.games_starting_near(event.get("start_time"))
+        if game_ids:
+            return ("games", tuple(sorted(game_ids))), [player for game_id in game_ids for player in self.by_game[game_id]]
+        return ("slate",), self.players
+
+    @staticmethod
+    def _match_names(event_names: List[str], by_name: Dict[str, Dict],
+                     known: Dict[str, Tuple[str, str]], learned: Dict[str, Tuple[str, str]]) -> Dict[str, Optional[str]]:
+        """
+        Name match event_names against by_name. An exact (normalized) roster
+        hit always wins; otherwise a known match is reused if it was made
+        against the same player in the same game. New fuzzy matches are added
+        to learned.
+        """
+        roster = {}
+        for player_name in by_name:
+            roster.setdefault(normalize_name(player_name), player_name)
+
+        names = {}
+        pending = []
+        for event_name in event_names:
+            exact = roster.get(normalize_name(event_name))
+            stored = known.get(event_name)
+            if exact:
+                names[event_name] = exact
+            elif stored and stored[0] in by_name and by_name[stored[0]]["game_id"] == stored[1]:
+                names[event_name] = stored[0]
+            else:
+                pending.append(event_name)
+        if pending:
+            fuzzy = match_player_names(pending, by_name)
+            names.update(fuzzy)
+            learned.update({name: (match, by_name[match]["game_id"]) for name, match in fuzzy.items() if match})
+        return names
+
+    def match_events(self, events: Iterable[Dict]) -> Dict[str, Optional[Dict]]:
+        """
+        Resolve each event to a player from the index.
+
+        Events are name matched in one batch per roster scope; a
+        name that isn't found in its scope is retried against the whole slate
+        before giving up. Fuzzy matches are kept in the state store, so an
+        event name is only fuzzy matched once per game.
+
+        Returns:
+            dict: event_id -> player dict (stats plus index keys), or None
+        """
+        matches: Dict[str, Optional[Dict]] = {}
+        scopes: Dict[Tuple, Tuple[List[Dict], List[Dict]]] = {}
+        for event in events:
+            key, roster = self.roster_for_event(event)
+            scopes.setdefault(key, (roster, []))[1].append(event)
+
+        known = STATE_STORE.get_name_matches(
+            self.league_id, (event["player_name"] for _, scope_events in scopes.values() for event in scope_events)
+        )
+        learned: Dict[str, Tuple[str, str]] = {}
+        retry = []
+        for key, (roster, scope_events) in scopes.items():
+            by_name = {}
+            for player in roster:
+                by_name.setdefault(player["player_name"], player)
+            names = self._match_names([event["player_name"] for event in scope_events], by_name, known, learned)
+            for event in scope_events:
+                name = names.get(event["player_name"])
+                matches[event["event_id"]] = by_name[name] if name else None
+                if not name and key != ("slate",):
+                    retry.append(event)
+
+        if retry:
+            by_name = {}
+            for player in self.players:
+                by_name.setdefault(player["player_name"], player)
+            names = self._match_names([event["player_name"] for event in retry], by_name, known, learned)
+            for event in retry:
+                name = names.get(event["player_name"])
+                matches[event["event_id"]] = by_name[name] if name else None
+
+        if learned:
+            STATE_STORE.save_name_matches(self.league_id, learned)
+        return matches
@@ -0,0 +1,93 @@
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import pytz
+
+from .constants import (
+    STATUS_FINAL, STATUS_HALFTIME, STATUS_IN_PROGRESS, STATUS_SCHEDULED,
+    POLL_INTERVAL_LIVE_SECONDS, POLL_INTERVAL_HALFTIME_SECONDS, POLL_INTERVAL_SCHEDULED_SECONDS,
+)
+
+POLL_INTERVALS = {
+    STATUS_IN_PROGRESS: POLL_INTERVAL_LIVE_SECONDS,
+    STATUS_HALFTIME: POLL_INTERVAL_HALFTIME_SECONDS,
+    STATUS_SCHEDULED: POLL_INTERVAL_SCHEDULED_SECONDS,
+}
+
+
+class PollScheduler:
+    """
+    Decides which games are due for a boxscore poll based on the status seen
+    at their last poll.
+
+    Live games are polled every POLL_INTERVAL_LIVE_SECONDS, games at halftime
+    and games that haven't started less often (a scheduled game is always
+    polled at its start time). The poll that first sees a game final is its
+    settle pass; after that the game isn't polled again.
+    """
+
+    def __init__(self, intervals: Dict[str, int] = POLL_INTERVALS,
+                 default_interval: int = POLL_INTERVAL_LIVE_SECONDS):
+        self.intervals = intervals
+        self.default_interval = default_interval
+        self._games: Dict[Tuple[str, str], Dict] = {}
+        self._lock = threading.Lock()
+
+    def is_due(self, league: str, game: Dict, now: Optional[datetime] = None) -> bool:
+        """Whether a game from scrape_game_schedule should be polled now"""
+        now = now or datetime.now(pytz.UTC)
+        with self._lock:
+            state = self._games.get((league, game["game_id"]))
+        if state is None:
+            return True
+        return not state["done"] and state["next_poll_at"] <= now
+
+    def is_finished(self, league: str, game_id: str) -> bool:
+        """Whether a game has had its final settle pass"""
+        with self._lock:
+            state = self._games.get((league, game_id))
+        return state is not None and state["done"]
+
+    def due_games(self, league: str, games: Iterable[Dict], now: Optional[datetime] = None) -> List[Dict]:
+        now = now or datetime.now(pytz.UTC)
+        return [game for game in games if self.is_due(league, game, now)]
+
+    def record_poll(self, league: str, game: Dict, status: str, now: Optional[datetime] = None) -> None:
+        """Schedule a game's next poll from the status its latest poll saw"""
+        now = now or datetime.now(pytz.UTC)
+        next_poll_at = now + timedelta(seconds=self.intervals.get(status, self.default_interval))
+        start_time = game.get("start_time")
+        if status == STATUS_SCHEDULED and start_time and now < start_time < next_poll_at:
+            next_poll_at = start_time
+        with self._lock:
+            self._games[(league, game["game_id"])] = {
+                "status": status,
+                "next_poll_at": next_poll_at,
+                "done": status == STATUS_FINAL,
+            }
+
+    def forget(self, league: str, game_id: str) -> None:
+        """Make a game due again, even after its final pass"""
+        with self._lock:
+            self._games.pop((league, game_id), None)
+
+    def retain(self, league: str, game_ids: Iterable[str]) -> None:
+        """Forget a league's games that are no longer on its slate"""
+        keep = set(game_ids)
+        with self._lock:
+            for key in [key for key in self._games if key[0] == league and key[1] not in keep]:
+                del self._games[key]
+
+    def seconds_until_next_poll(self, now: Optional[datetime] = None) -> Optional[float]:
+        """Time until the earliest tracked game is due, None when no game is waiting on a poll"""
+        now = now or datetime.now(pytz.UTC)
+        with self._lock:
+            pending = [state["next_poll_at"] for state in self._games.values() if not state["done"]]
+        if not pending:
+            return None
+        return max(0.0, (min(pending) - now).total_seconds())
+
+
+# Create a singleton instance
+POLL_SCHEDULER = PollScheduler()
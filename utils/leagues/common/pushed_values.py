@@ -0,0 +1,66 @@
+import os
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from utils.state_store import STATE_STORE, StateStore
+
+
+class PushedValues:
+    """
+    The result_numeric/status last written to Hasura for each live betting event.
+
+    Lets the processors leave out of update_betting_events_many every event
+    whose value hasn't moved since the previous poll. Backed by the state
+    store so restarts don't resend the whole live book; loaded once per
+    process, so a forked worker starts from what is on disk.
+    """
+
+    def __init__(self, store: Optional[StateStore] = STATE_STORE):
+        self.store = store
+        self._values: Dict[str, Tuple[str, str]] = {}
+        self._loaded_pid = None
+        self._lock = threading.Lock()
+
+    def _ensure_loaded(self) -> None:
+        # Called with the lock held
+        if self._loaded_pid == os.getpid():
+            return
+        self._loaded_pid = os.getpid()
+        self._values = self.store.load_pushed_values() if self.store else {}
+
+    def changed(self, betting_events: Iterable[Dict]) -> List[Dict]:
+        """The events whose result_numeric or status differ from what was last pushed"""
+        with self._lock:
+            self._ensure_loaded()
+            return [
+                event for event in betting_events
+                if self._values.get(event["event_id"]) != (event["result_numeric"], event["status"])
+            ]
+
+    def record(self, betting_events: Iterable[Dict]) -> None:
+        """Remember the values of events that were written successfully"""
+        values = {event["event_id"]: (event["result_numeric"], event["status"]) for event in betting_events}
+        with self._lock:
+            self._ensure_loaded()
+            self._values.update(values)
+        if self.store and values:
+            self.store.save_pushed_values(values)
+
+    def forget(self, event_id: str) -> None:
+        """Drop a settled event"""
+        with self._lock:
+            self._ensure_loaded()
+            self._values.pop(event_id, None)
+        if self.store:
+            self.store.delete_pushed_value(event_id)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._values = {}
+            self._loaded_pid = os.getpid()
+        if self.store:
+            self.store.clear_pushed_values()
+
+
+# Create a singleton instance
+PUSHED_VALUES = PushedValues()
@@ -0,0 +1,150 @@
+import time
+import threading
+import logging
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional
+
+import pytz
+
+from utils.http_client import http_client
+from .constants import LEAGUE_ENDPOINTS, SCHEDULE_LOOKAHEAD_DAYS, SCHEDULE_REFRESH_SECONDS
+
+logger = logging.getLogger(__name__)
+
+# ESPN groups scoreboard days by US Eastern date
+eastern = pytz.timezone('US/Eastern')
+
+# Extra scoreboard params needed to get the full slate for a league
+SCHEDULE_PARAMS = {
+    "cbb": "groups=50",
+}
+# Days covered by a single range request
+WINDOW_DAYS = 31
+
+
+def game_day(current_date: datetime) -> date:
+    """Scoreboard date a datetime falls on (naive datetimes are taken as local time)"""
+    return current_date.astimezone(eastern).date()
+
+
+def game_from_competition(competition: Dict, event: Dict) -> Optional[Dict]:
+    """Game ID, start, scoreboard date, status and team abbreviations of a scoreboard competition"""
+    game_id = competition.get("id")
+    start_time = competition.get("date") or event.get("date")
+    if not game_id or not start_time:
+        return None
+    start = datetime.fromisoformat(start_time.replace("Z", "+00:00"))
+    return {
+        "game_id": game_id,
+        "start_time": start,
+        "day": start.astimezone(eastern).date(),
+        "status": competition.get("status", {}).get("type", {}).get("name", ""),
+        "teams": [
+            competitor.get("team", {}).get("abbreviation", "")
+            for competitor in competition.get("competitors", [])
+        ],
+    }
+
+
+class ScheduleIndex:
+    """In-memory index of a league's games by date, built from range scoreboard requests"""
+
+    def __init__(
+        self,
+        league: str,
+        endpoint: str,
+        lookahead_days: int = SCHEDULE_LOOKAHEAD_DAYS,
+        refresh_seconds: float = SCHEDULE_REFRESH_SECONDS,
+        params: str = "",
+    ):
+        self.league = league
+        self.endpoint = endpoint
+        self.lookahead_days = lookahead_days
+        self.refresh_seconds = refresh_seconds
+        self.params = params
+        self.built_at: Optional[float] = None
+        self._games_by_date: Dict[date, List[Dict]] = {}
+        self._lock = threading.Lock()
+        self._build_lock = threading.Lock()
+        self._refresh_thread: Optional[threading.Thread] = None
+
+    def refresh(self, start: Optional[date] = None) -> bool:
+        """
+        Rebuild the index from yesterday through the lookahead window with one
+        range request per WINDOW_DAYS. The old index is kept if a request fails.
+        """
+        start = start or game_day(datetime.now()) - timedelta(days=1)
+        end = start + timedelta(days=self.lookahead_days)
+        games_by_date: Dict[date, List[Dict]] = {}
+
+        window_start = start
+        while window_start <= end:
+            window_end = min(window_start + timedelta(days=WINDOW_DAYS - 1), end)
+            url = f"{self.endpoint}?dates={window_start:%Y%m%d}-{window_end:%Y%m%d}&limit=1000"
+            if self.params:
+                url = f"{url}&{self.params}"
+
+            response = http_client.get(url)
+            if response.status_code != 200:
+                logger.warning(f"{self.league.upper()} schedule refresh failed: {response.status_code}")
+                return False
+
+            for event in response.json().get("events", []):
+                for competition in event.get("competitions", []):
+                    game = game_from_competition(competition, event)
+                    if game:
+                        games_by_date.setdefault(game["day"], []).append(game)
+            window_start = window_end + timedelta(days=1)
+
+        with self._lock:
+            self._games_by_date = games_by_date
+            self.built_at = time.monotonic()
+        logger.info(f"{self.league.upper()} schedule index built: {sum(map(len, games_by_date.values()))} games")
+        return True
+
+    def ensure_built(self) -> None:
+        """Build the index on first use and keep it fresh in the background"""
+        with self._build_lock:
+            if self.built_at is None:
+                self.refresh()
+            if self._refresh_thread is None:
+                self._refresh_thread = threading.Thread(
+                    target=self._refresh_forever, name=f"{self.league}-schedule", daemon=True
+                )
+                self._refresh_thread.start()
+
+    def _refresh_forever(self) -> None:
+        while True:
+            time.sleep(self.refresh_seconds)
+            try:
+                self.refresh()
+            except Exception as e:
+                logger.error(f"{self.league.upper()} schedule refresh failed: {str(e)}")
+
+    def games_on(self, day: date) -> List[Dict]:
+        """Games scheduled on a scoreboard date"""
+        self.ensure_built()
+        with self._lock:
+            return list(self._games_by_date.get(day, []))
+
+    def next_game_date(self, from_day: date, max_days: int = 14) -> Optional[date]:
+        """First date on or after from_day, within max_days, that has games"""
+        self.ensure_built()
+        with self._lock:
+            for offset in range(max_days):
+                day = from_day + timedelta(days=offset)
+                if self._games_by_date.get(day):
+                    return day
+        return None
+
+
+_indexes: Dict[str, ScheduleIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_schedule_index(league: str) -> ScheduleIndex:
+    """Process-wide schedule index for a league"""
+    with _indexes_lock:
+        if league not in _indexes:
+            _indexes[league] = ScheduleIndex(league, LEAGUE_ENDPOINTS[league], params=SCHEDULE_PARAMS.get(league, ""))
+        return _indexes[league]
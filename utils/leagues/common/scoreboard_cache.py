@@ -0,0 +1,63 @@
+import time
+import threading
+import logging
+from typing import Dict, List, Optional, Tuple
+
+from utils.http_client import http_client
+from .constants import SCOREBOARD_CACHE_TTL_SECONDS
+
+logger = logging.getLogger(__name__)
+
+
+class ScoreboardCache:
+    """TTL cache of ESPN scoreboard events keyed by league and date"""
+
+    def __init__(self, ttl_seconds: float = SCOREBOARD_CACHE_TTL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self._entries: Dict[Tuple[str, str], Tuple[float, List[Dict]]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, league: str, date_key: str) -> Optional[List[Dict]]:
+        """Cached events for league/date, or None if missing or expired"""
+        with self._lock:
+            entry = self._entries.get((league, date_key))
+            if entry is None:
+                return None
+            expires_at, events = entry
+            if expires_at < time.monotonic():
+                del self._entries[(league, date_key)]
+                return None
+            return events
+
+    def put(self, league: str, date_key: str, events: List[Dict]) -> None:
+        with self._lock:
+            self._entries[(league, date_key)] = (time.monotonic() + self.ttl_seconds, events)
+
+    def get_events(self, league: str, date_key: str, url: str) -> List[Dict]:
+        """
+        Return the scoreboard events for league/date, fetching url on a miss.
+        Failed fetches aren't cached so the next run tries again.
+        """
+        events = self.get(league, date_key)
+        if events is not None:
+            return events
+
+        response = http_client.get(url)
+        if response.status_code != 200:
+            logger.warning(f"Scoreboard request for {league} {date_key} failed: {response.status_code}")
+            return []
+
+        events = response.json().get("events", [])
+        self.put(league, date_key, events)
+        return events
+
+    def invalidate(self, league: Optional[str] = None, date_key: Optional[str] = None) -> None:
+        """Drop cached entries, optionally limited to a league and/or date"""
+        with self._lock:
+            for key in list(self._entries):
+                if (league is None or key[0] == league) and (date_key is None or key[1] == date_key):
+                    del self._entries[key]
+
+
+# Create a singleton instance
+SCOREBOARD_CACHE = ScoreboardCache()
@@ -0,0 +1,91 @@
+import json
+import re
+from typing import Callable, Dict, Iterable, Union
+
+# gamepackageJSON sections the processors read, with a shape check used to
+# tell the real top-level section apart from a same-named key nested in
+# news/videos/plays.
+GAMEPACKAGE_SECTIONS: Dict[str, Callable[[object], bool]] = {
+    "boxscore": lambda value: isinstance(value, dict) and ("players" in value or "teams" in value),
+    "header": lambda value: isinstance(value, dict) and "competitions" in value,
+    "seasonseries": lambda value: isinstance(value, list),
+}
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+_key_patterns: Dict[str, "re.Pattern"] = {}
+
+
+def _key_pattern(key: str) -> "re.Pattern":
+    if key not in _key_patterns:
+        _key_patterns[key] = re.compile(r'"%s"[ \t\n\r]*:[ \t\n\r]*' % re.escape(key))
+    return _key_patterns[key]
+
+
+def _previous_char(raw: str, index: int) -> str:
+    """Last non-whitespace character before index"""
+    index -= 1
+    while index >= 0 and raw[index] in " \t\n\r":
+        index -= 1
+    return raw[index] if index >= 0 else ""
+
+
+_MISSING = object()
+
+
+def _decode_section(raw: str, start: int, key: str, is_valid: Callable[[object], bool]):
+    """
+    Decode the value of the only object member named key that passes is_valid.
+
+    Returns _MISSING when no candidate qualifies (the section isn't in this
+    payload). Raises ValueError when more than one does, so the caller can
+    fall back to a full decode.
+    """
+    found = []
+    for match in _key_pattern(key).finditer(raw, start):
+        # A member key is preceded by '{' or ',' and its value by ',' or '}'
+        if _previous_char(raw, match.start()) not in ("{", ","):
+            continue
+        try:
+            value, end = _decoder.raw_decode(raw, match.end())
+        except ValueError:
+            continue
+        end = _WHITESPACE.match(raw, end).end()
+        if end < len(raw) and raw[end] in ",}" and is_valid(value):
+            found.append(value)
+    if not found:
+        return _MISSING
+    if len(found) > 1:
+        raise ValueError(f"Could not locate a unique '{key}' section ({len(found)} candidates)")
+    return found[0]
+
+
+def decode_gamepackage(raw: Union[str, bytes], sections: Iterable[str] = GAMEPACKAGE_SECTIONS) -> Dict:
+    """
+    Decode only the given gamepackageJSON sections of an ESPN boxscore response.
+
+    Plays, news, videos and standings make up most of the payload but are
+    never read, so instead of materializing the whole document each wanted
+    section is located by its key and decoded on its own with the C decoder.
+    The result has the same shape as the full document restricted to those
+    sections; a section the payload doesn't have is left out. Only when a
+    section can't be told apart from a same-named key is it decoded in full.
+    """
+    if isinstance(raw, bytes):
+        raw = raw.decode("utf-8")
+
+    gamepackage_match = _key_pattern("gamepackageJSON").search(raw)
+    try:
+        if not gamepackage_match:
+            raise ValueError("No gamepackageJSON in payload")
+        gamepackage = {}
+        for key in sections:
+            value = _decode_section(raw, gamepackage_match.end(), key, GAMEPACKAGE_SECTIONS.get(key, lambda value: True))
+            if value is not _MISSING:
+                gamepackage[key] = value
+    except ValueError:
+        data = json.loads(raw)
+        gamepackage = data.get("gamepackageJSON", {})
+        return {"gamepackageJSON": {key: gamepackage[key] for key in sections if key in gamepackage}}
+
+    return {"gamepackageJSON": gamepackage}
@@ -0,0 +1,141 @@
+import os
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+import requests
+
+from utils.http_client import http_client
+from utils.state_store import STATE_STORE
+from .betting_events import ACTIVE_EVENTS_CACHE
+from .constants import SETTLEMENT_CONCURRENCY
+from .pushed_values import PUSHED_VALUES
+from .helpers import get_hasura_headers
+from .player_index import PlayerIndex
+
+logger = logging.getLogger(__name__)
+
+COMPLETE_ACTION = "complete-betting-event"
+DNP_ACTION = "set-dnp"
+
+
+class SettlementBatch:
+    """
+    Completions and DNPs collected during a league's event loop.
+
+    The backend actions settle one event per call, so flush() sends them on a
+    bounded thread pool sharing one set of auth headers instead of one after
+    the other, and reports the outcome of every item. Events already settled
+    (per the state store) are not queued again, e.g. when the active events
+    query still lists them just after settlement.
+    """
+
+    def __init__(self, league: str, max_workers: int = SETTLEMENT_CONCURRENCY):
+        self.league = league
+        self.max_workers = max_workers
+        self.items: List[Dict] = []
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def _already_settled(self, event: Dict) -> bool:
+        if not STATE_STORE.is_settled(event["event_id"]):
+            return False
+        logger.info(f"Skipping {self.league} event {event['event_id']}, already settled")
+        ACTIVE_EVENTS_CACHE.evict(event["event_id"])
+        return True
+
+    def complete(self, event: Dict, actual_result: float, game_id: Optional[str] = None, force: bool = False) -> None:
+        """Queue a completion; force sends it even if the event was already settled (see resettle_completed_events)"""
+        if not force and self._already_settled(event):
+            return
+        self.items.append({
+            "event_id": event["event_id"],
+            "action": COMPLETE_ACTION,
+            "json": {"actual_result": actual_result, "betting_event_id": event["event_id"]},
+            "event": event,
+            "game_id": game_id,
+            "actual_result": actual_result,
+        })
+
+    def set_dnp(self, event: Dict) -> None:
+        if self._already_settled(event):
+            return
+        self.items.append({
+            "event_id": event["event_id"],
+            "action": DNP_ACTION,
+            "json": {"betting_event_id": event["event_id"]},
+        })
+
+    def _send(self, item: Dict, headers: Dict) -> Dict:
+        try:
+            response = http_client.post(
+                f"{os.getenv('BACKEND_URL')}/actions/{item['action']}",
+                headers=headers,
+                json=item["json"]
+            )
+            response.raise_for_status()
+        except requests.exceptions.RequestException as e:
+            logger.error(f"Failed to {item['action']} for event {item['event_id']}: {str(e)}")
+            return {"event_id": item["event_id"], "action": item["action"], "success": False, "error": str(e)}
+        STATE_STORE.mark_settled(
+            item["event_id"], item["action"], self.league.lower(), item.get("game_id"),
+            item.get("event"), item.get("actual_result")
+        )
+        ACTIVE_EVENTS_CACHE.evict(item["event_id"])
+        PUSHED_VALUES.forget(item["event_id"])
+        return {"event_id": item["event_id"], "action": item["action"], "success": True}
+
+    def flush(self) -> List[Dict]:
+        """
+        Send every collected action and clear the batch.
+
+        Returns:
+            list: one {"event_id", "action", "success"[, "error"]} per item,
+                  in the order they were collected
+        """
+        items, self.items = self.items, []
+        if not items:
+            return []
+
+        headers = get_hasura_headers()
+        workers = max(1, min(self.max_workers, len(items)))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="settlement") as executor:
+            results = list(executor.map(lambda item: self._send(item, headers), items))
+
+        failed = sum(1 for result in results if not result["success"])
+        logger.info(f"{self.league} settlement: {len(results) - failed} of {len(results)} actions succeeded")
+        return results
+
+
+def resettle_completed_events(league: str, league_id: int, game_id: str, game_players: Dict[str, Dict],
+                  calculate_stat_value: Callable[[str, Dict], Optional[float]]) -> List[Dict]:
+    """
+    Complete a game's already completed events again with values from a fresh
+    boxscore, e.g. after an ESPN stat correction. Events whose value is
+    unchanged are left alone. DNPs carry no game, so they aren't revisited.
+
+    Returns:
+        list: SettlementBatch.flush() results for the events sent again
+    """
+    settled = [
+        row for row in STATE_STORE.settled_events_for_game(league.lower(), game_id)
+        if row["action"] == COMPLETE_ACTION and row["event"]
+    ]
+    players = PlayerIndex(league_id)
+    players.add_game(game_id, game_players)
+    player_matches = players.match_events([row["event"] for row in settled])
+
+    settlement = SettlementBatch(league.upper())
+    for row in settled:
+        event = row["event"]
+        player = player_matches.get(event["event_id"])
+        if not player:
+            logger.warning(f"Player {event['player_name']} not in the refetched {league.upper()} game {game_id}, leaving event {event['event_id']}")
+            continue
+        actual_result = calculate_stat_value(event["stat_type"], player)
+        if actual_result is None or actual_result == row["actual_result"]:
+            continue
+        logger.info(f"Re-completing event {event['event_id']}: {row['actual_result']} -> {actual_result}")
+        settlement.complete(event, actual_result, game_id, force=True)
+    return settlement.flush()
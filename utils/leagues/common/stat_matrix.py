@@ -0,0 +1,111 @@
+import logging
+from typing import Dict, List, Optional, Tuple, Union
+
+import numpy as np
+
+from .helpers import BASKETBALL_STAT_MAP, calculate_fantasy_score
+
+logger = logging.getLogger(__name__)
+
+# Columns of a game's stat matrix; shot stats ("5-10") are split into made and attempted
+STAT_COLUMNS = (
+    "MIN", "FGM", "FGA", "3PM", "3PA", "FTM", "FTA", "OREB", "DREB",
+    "REB", "AST", "STL", "BLK", "TO", "PF", "+/-", "PTS",
+)
+COLUMN_INDEX = {column: i for i, column in enumerate(STAT_COLUMNS)}
+SHOT_COLUMNS = {"FG": ("FGM", "FGA"), "3PT": ("3PM", "3PA"), "FT": ("FTM", "FTA")}
+
+# calculate_fantasy_score as column weights
+FANTASY_SCORE_WEIGHTS = {
+    "FGM": 2, "FGA": -1, "3PM": 1, "FTM": 1, "FTA": -1,
+    "REB": 1, "AST": 2, "STL": 4, "BLK": 4, "TO": -2,
+}
+
+# Calculators in BASKETBALL_STAT_MAP that are linear in the columns
+LINEAR_CALCULATORS = {calculate_fantasy_score: FANTASY_SCORE_WEIGHTS}
+
+
+def stat_weights(spec: Union[str, dict, list]) -> np.ndarray:
+    """
+    Column weights that compute one BASKETBALL_STAT_MAP entry from a stat row.
+    Raises ValueError for entries that can't be written as a weighted sum.
+    """
+    weights = np.zeros(len(STAT_COLUMNS))
+    if isinstance(spec, dict):
+        if spec.get("calculator") in LINEAR_CALCULATORS:
+            for column, weight in LINEAR_CALCULATORS[spec["calculator"]].items():
+                weights[COLUMN_INDEX[column]] = weight
+            return weights
+        if spec.get("key") in SHOT_COLUMNS and "made" in spec:
+            made, attempted = SHOT_COLUMNS[spec["key"]]
+            weights[COLUMN_INDEX[made if spec["made"] else attempted]] = 1
+            return weights
+    elif isinstance(spec, list):
+        if spec and all(column in COLUMN_INDEX for column in spec):
+            for column in spec:
+                weights[COLUMN_INDEX[column]] += 1
+            return weights
+    elif spec in COLUMN_INDEX:
+        weights[COLUMN_INDEX[spec]] = 1
+        return weights
+    raise ValueError(f"unsupported stat spec {spec!r}")
+
+
+def compile_prop_weights(stat_map: Dict) -> Tuple[Dict[str, int], np.ndarray]:
+    """
+    Stack every stat type's weights into a (columns x props) matrix.
+    Returns the prop column of each stat type and the matrix; stat types that
+    don't compile are logged and left out.
+    """
+    prop_index = {}
+    columns = []
+    for stat_type, spec in stat_map.items():
+        try:
+            columns.append(stat_weights(spec))
+        except ValueError as e:
+            logger.warning(f"Skipping basketball stat type {stat_type!r}: {str(e)}")
+            continue
+        prop_index[stat_type] = len(columns) - 1
+    return prop_index, np.column_stack(columns)
+
+
+PROP_INDEX, PROP_WEIGHTS = compile_prop_weights(BASKETBALL_STAT_MAP)
+
+
+def _shot_split(value) -> Tuple[int, int]:
+    try:
+        made, attempted = value.split("-")
+        return int(made), int(attempted)
+    except (ValueError, AttributeError):
+        return 0, 0
+
+
+def stat_row(player_stats: Dict) -> List[float]:
+    """One player's stats (as returned by process_player_stats) laid out as STAT_COLUMNS"""
+    row = [0.0] * len(STAT_COLUMNS)
+    for key, value in player_stats.items():
+        if key in SHOT_COLUMNS:
+            made, attempted = SHOT_COLUMNS[key]
+            row[COLUMN_INDEX[made]], row[COLUMN_INDEX[attempted]] = _shot_split(value)
+        elif key in COLUMN_INDEX:
+            row[COLUMN_INDEX[key]] = value
+    return row
+
+
+def stat_matrix(players_stats: List[Dict]) -> np.ndarray:
+    """A game's players x STAT_COLUMNS matrix"""
+    return np.array([stat_row(player_stats) for player_stats in players_stats], dtype=float).reshape(-1, len(STAT_COLUMNS))
+
+
+def prop_matrix(players_stats: List[Dict]) -> np.ndarray:
+    """Every supported prop for every player of a game, players x props, in one product"""
+    return stat_matrix(players_stats) @ PROP_WEIGHTS
+
+
+def prop_value(props: np.ndarray, stat_type: str) -> Optional[Union[int, float]]:
+    """A player's value for stat_type from their prop_matrix row, None if the stat type is unknown"""
+    index = PROP_INDEX.get(stat_type)
+    if index is None:
+        return None
+    value = float(props[index])
+    return int(value) if value.is_integer() else value
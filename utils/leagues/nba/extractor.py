@@ -1,11 +1,14 @@
-import requests
+from utils.http_client import http_client
 import json
 import os
 from datetime import datetime, timedelta
-from typing import Set, Dict, List
-from ..common.constants import STATUS_FINAL, STATUS_IN_PROGRESS, STATUS_SCHEDULED
+from typing import Set, Dict, List, Optional
+from ..common.constants import STATUS_FINAL, STATUS_IN_PROGRESS, STATUS_SCHEDULED, ESPN_CDN_URL
+from ..common.change_tracker import BoxscoreChangeTracker
+from ..common.selective_json import decode_gamepackage
 import pytz
-BOXSCORE_URL = "https://cdn.espn.com/core/nba/"
+BOXSCORE_URL = f"{ESPN_CDN_URL}/nba/"
+BOXSCORE_TRACKER = BoxscoreChangeTracker("nba")
 print(BOXSCORE_URL)
 
 def extract_players(input_data: Dict) -> List:
@@ -35,6 +38,7 @@ def parse_players(players_data):
                     active = athlete.get("active", False)
                     reason = athlete.get("reason", "")
                     jersey = athlete["athlete"].get("jersey", "")
+                    athlete_id = athlete["athlete"].get("id", "")
 
                     athlete_stats = athlete.get("stats", [])
                     player_stats_list = []
@@ -53,6 +57,7 @@ def parse_players(players_data):
                             "active": active,
                             "reason": reason,
                             "jersey": jersey,
+                            "athlete_id": athlete_id,
                         },
                         "player_statistics": player_stats_list,
                     }
@@ -60,18 +65,29 @@ def parse_players(players_data):
 
     return all_players
 
-def extract_game_data(game_id: str) -> Dict:
-    """Fetches and extracts game data for a specific game ID."""
+def extract_game_data(game_id: str) -> Optional[Dict]:
+    """
+    Fetches and extracts game data for a specific game ID.
+    Returns None when the boxscore hasn't changed since the last fetch.
+    """
     url = f"{BOXSCORE_URL}/boxscore?xhr=1&gameId={game_id}"
-    response = requests.get(url)
+    response = http_client.get(url, headers=BOXSCORE_TRACKER.conditional_headers(game_id))
+
+    if response.status_code == 304:
+        BOXSCORE_TRACKER.record_not_modified(game_id)
+        return None
 
     # with open(f"game_data_nba_{game_id}.json", "w") as f:
     #     json.dump(response.json(), f)
 
     if response.status_code != 200:
         raise Exception(f"Failed to fetch data for gameId {game_id}: {response.status_code}")
-        
-    return response.json()
+
+    # Only boxscore, header and seasonseries are used; skip plays/news/videos/standings
+    data = decode_gamepackage(response.content)
+    if not BOXSCORE_TRACKER.has_changed(game_id, data, response.headers):
+        return None
+    return data
 
 def extract_game_status(events: Dict, current_date: datetime) -> str:
     """Extract game status from event data."""
@@ -1,11 +1,16 @@
-import requests
+from utils.http_client import http_client
 import json
 import os
 from datetime import datetime, timedelta
-from typing import Dict, List
-from ..common.constants import STATUS_FINAL, STATUS_IN_PROGRESS, STATUS_SCHEDULED
+from typing import Dict, List, Optional
+from ..common.constants import STATUS_FINAL, STATUS_IN_PROGRESS, STATUS_SCHEDULED, ESPN_CDN_URL
+from ..common.change_tracker import BoxscoreChangeTracker
+from ..common.selective_json import decode_gamepackage
 
-NFL_BOXSCORE_URL = f"https://cdn.espn.com/core/nfl/boxscore?xhr=1"
+NFL_BOXSCORE_URL = f"{ESPN_CDN_URL}/nfl/boxscore?xhr=1"
+BOXSCORE_TRACKER = BoxscoreChangeTracker("nfl")
+# gamepackageJSON sections process_game_data reads
+BOXSCORE_SECTIONS = ("boxscore", "header")
 
 def extract_players(input_data: Dict) -> List:
     """Extracts the 'players' section from the input JSON."""
@@ -33,6 +38,7 @@ def parse_players(players_data):
             for athlete in stat_category.get("athletes", []):
                 player_name = athlete["athlete"]["displayName"]
                 jersey = athlete["athlete"].get("jersey", "")
+                athlete_id = athlete["athlete"].get("id", "")
                 
                 # Convert stats array to our standard format
                 player_stats_list = []
@@ -61,6 +67,7 @@ def parse_players(players_data):
                         "active": True,
                         "reason": "",
                         "jersey": jersey,
+                        "athlete_id": athlete_id,
                         "category": category_name  # Add category for NFL-specific processing
                     },
                     "player_statistics": player_stats_list
@@ -80,15 +87,26 @@ def parse_players(players_data):
     
     return all_players
 
-def extract_game_data(game_id: str) -> Dict:
-    """Fetches and extracts game data for a specific game ID."""
+def extract_game_data(game_id: str) -> Optional[Dict]:
+    """
+    Fetches and extracts game data for a specific game ID.
+    Returns None when the boxscore hasn't changed since the last fetch.
+    """
     url = f"{NFL_BOXSCORE_URL}&gameId={game_id}"
-    response = requests.get(url)
-    
+    response = http_client.get(url, headers=BOXSCORE_TRACKER.conditional_headers(game_id))
+
+    if response.status_code == 304:
+        BOXSCORE_TRACKER.record_not_modified(game_id)
+        return None
+
     if response.status_code != 200:
         raise Exception(f"Failed to fetch data for gameId {game_id}: {response.status_code}")
-        
-    return response.json()
+
+    # Only boxscore and header are used; skip seasonseries/plays/news/videos/standings
+    data = decode_gamepackage(response.content, BOXSCORE_SECTIONS)
+    if not BOXSCORE_TRACKER.has_changed(game_id, data, response.headers):
+        return None
+    return data
 
 def extract_game_status(event: Dict, current_date: datetime) -> str:
     """Extract game status from event data."""
@@ -1,13 +1,17 @@
-from typing import Set, Dict, Optional, Union
+from typing import Set, Dict, Optional, Tuple, List
 from datetime import datetime
-import os
 import json
 import requests
 import logging
-from .extractor import extract_game_data, extract_players, parse_players, extract_game_status
+from .extractor import extract_game_data, extract_players, parse_players, extract_game_status, BOXSCORE_TRACKER
 from ..common.constants import STATUS_FINAL, STATUS_IN_PROGRESS, STATUS_SCHEDULED, NFL_LEAGUE_ID
 from utils.s3_service import upload_to_s3
-from ..common.helpers import get_hasura_headers, NFL_STAT_MAP
+from ..common.betting_events import fetch_active_betting_events
+from ..common.settlement import SettlementBatch
+from ..common.finalized_games import FINALIZED_GAMES, record_finalized_games
+from ..common.bulk_update import push_betting_event_updates
+from ..common.player_index import PlayerIndex, game_start_time, player_details
+from ..common.helpers import NFL_STAT_ACCESSORS, process_games_concurrently
 import pytz
 from datetime import timedelta
 
@@ -23,10 +27,26 @@ def process_player_stats(player_statistics: dict) -> dict:
             stats_dict[stat_item[0]] = 0.0
     return stats_dict
 
-def process_game_data(game_id: str, current_date: datetime) -> Optional[Dict]:
-    """Process individual game data and return player statistics."""
+def process_game_data(game_id: str, current_date: datetime) -> Optional[Tuple[Dict, bool]]:
+    """
+    Process individual game data and return player statistics, along with
+    whether the boxscore changed since the last poll.
+    """
     try:
+        if FINALIZED_GAMES.is_finalized("nfl", game_id):
+            # Final and fully settled; reuse what we have instead of fetching it again
+            print(f"Game already finalized, {game_id}")
+            cached = BOXSCORE_TRACKER.last_result(game_id)
+            return (cached, False) if cached is not None else None
         data = extract_game_data(game_id)
+        if data is None:
+            cached = BOXSCORE_TRACKER.last_result(game_id)
+            if cached is not None:
+                print(f"Boxscore unchanged since last poll, {game_id}")
+                return cached, False
+            # Nothing cached to reuse (the last parse failed), fetch the full boxscore again
+            BOXSCORE_TRACKER.forget(game_id)
+            data = extract_game_data(game_id)
         event = data.get("gamepackageJSON", {}).get("header", [{}]).get("competitions", [])[0]
         game_status = extract_game_status(event, current_date)
 
@@ -39,102 +59,104 @@ def process_game_data(game_id: str, current_date: datetime) -> Optional[Dict]:
         upload_to_s3(players_data, f"NFL/NFL_PLAYERDATA/players_{game_id}.json")
         parsed_players = parse_players(players_data)
 
-        return {
+        start_time = game_start_time(data)
+        game_players = {
             player["player_name"]: {
                 **process_player_stats(player["player_statistics"]),
-                "game_status": game_status
+                "game_status": game_status,
+                **player_details(game_id, player, start_time)
             }
             for player in parsed_players
             if player.get("player_statistics")
         }
+        BOXSCORE_TRACKER.store_result(game_id, game_players)
+        return game_players, True
 
     except Exception as e:
         logger.error(f"Error processing game {game_id}: {str(e)}")
         return None
 
-def update_betting_event(event: Dict, player_stats: Dict, updated_stat: float, testing: str, testing_mode: bool) -> Optional[Dict]:
-    """Update or complete a betting event based on game status."""
-    try:
-        print("player_stats", player_stats)
-        if (player_stats["game_status"] == STATUS_FINAL and event["in_progress"]) or (player_stats["game_status"] == STATUS_SCHEDULED) or testing == "complete":
-            print("completed betting event")
-            response = requests.post(
-                f"{os.getenv('BACKEND_URL')}/actions/complete-betting-event",
-                headers=get_hasura_headers(),
-                json={"actual_result": updated_stat, "betting_event_id": event["event_id"]}
-            )
-            response.raise_for_status()
-            return None
-        elif (player_stats["game_status"] == STATUS_IN_PROGRESS) or (testing_mode and testing == "in_progress"):
-            return {**event, "result_numeric": str(updated_stat), "status": "IN_PROGRESS"}
+def update_betting_event(event: Dict, player_stats: Dict, updated_stat: float, testing: str, testing_mode: bool, settlement: SettlementBatch) -> Optional[Dict]:
+    """
+    Update a live betting event, or queue its completion on the settlement
+    batch once the game is final.
+    """
+    print("player_stats", player_stats)
+    if (player_stats["game_status"] == STATUS_FINAL and event["in_progress"]) or (player_stats["game_status"] == STATUS_SCHEDULED) or testing == "complete":
+        print("completed betting event")
+        settlement.complete(event, updated_stat, player_stats["game_id"])
         return None
-    except requests.exceptions.RequestException as e:
-        logger.error(f"Failed to update betting event {event['event_id']}: {str(e)}")
-        return None
-
-def calculate_stat_value(stat_type: str, player_stats: Dict) -> float:
-    """Calculate the stat value based on the stat type."""
-    if "+" in stat_type:
-        # Handle combined stats (e.g., "passingYards+rushingYards")
-        return sum(float(player_stats.get(key, 0)) for key in stat_type.split("+"))
-    elif "/" in stat_type:
-        # Handle ratio stats (e.g., "completions/passingAttempts")
-        numerator, denominator = stat_type.split("/")
-        if float(player_stats.get(denominator, 0)) != 0:
-            return float(player_stats.get(numerator, 0))
-        return 0
-    return float(player_stats.get(stat_type, 0))
-
-def process_boxscores(game_ids: Set[str], current_date: datetime, testing: str, testing_mode: bool) -> Dict:
-    """Process all game boxscores and update betting events."""
-    players = {}
-    for game_id in game_ids:
-        game_data = process_game_data(game_id, current_date)
-        if game_data:
-            players.update(game_data)
-
-    try:
-        response = requests.get(
-            f"{os.getenv('BACKEND_URL')}/api/rest/getactivebettingevents",
-            headers=get_hasura_headers()
-        )
-        response.raise_for_status()
-
-        betting_events = response.json()["betting_events"]
-    except requests.exceptions.RequestException as e:
-        logger.error(f"Failed to fetch active betting events: {str(e)}")
-        return players
+    elif (player_stats["game_status"] == STATUS_IN_PROGRESS) or (testing_mode and testing == "in_progress"):
+        return {**event, "result_numeric": str(updated_stat), "status": "IN_PROGRESS"}
+    return None
+
+def calculate_stat_value(stat_type: str, player_stats: Dict) -> Optional[float]:
+    """Calculate the stat value for an event's stat type, None if the stat type is unknown."""
+    stat_accessor = NFL_STAT_ACCESSORS.get(stat_type)
+    return stat_accessor(player_stats) if stat_accessor else None
+
+def process_boxscores(game_ids: Set[str], current_date: datetime, testing: str, testing_mode: bool, betting_events: Optional[List[Dict]] = None,
+                      shared_game_ids: Optional[List[str]] = None, owned_event_ids: Optional[List[str]] = None) -> Dict:
+    """
+    Process all game boxscores and update betting events.
+    betting_events is this league's slice of the active events; fetched here if not given.
+    When run as one of several jobs (see group_games), shared_game_ids are the
+    events' candidate games other jobs fetch and owned_event_ids the events
+    this job may set DNP.
+    """
+    players = PlayerIndex(NFL_LEAGUE_ID)
+    BOXSCORE_TRACKER.retain(game_ids)
+    games = process_games_concurrently(game_ids, process_game_data, current_date)
+    BOXSCORE_TRACKER.record_pass(game_id for game_id, result in games.items() if result)
+    for game_id, result in games.items():
+        if result:
+            game_data, _ = result
+            players.add_game(game_id, game_data)
+
+    logger.info(f"NFL boxscore change tracking: {BOXSCORE_TRACKER.stats()}")
+    # Players in games another job fetches are matched from their stored results
+    shared_complete = players.add_stored_games(shared_game_ids or [], BOXSCORE_TRACKER)
+
+    if betting_events is None:
+        try:
+            betting_events = fetch_active_betting_events(NFL_LEAGUE_ID)
+        except requests.exceptions.RequestException as e:
+            logger.error(f"Failed to fetch active betting events: {str(e)}")
+            return players
     
 
 
 
+    # Match every event to a player in the games starting with it, batched per roster
+    player_matches = players.match_events(betting_events)
+
     new_betting_events = []
+    # Completions and DNPs are sent together once every event has been checked
+    settlement = SettlementBatch("NFL")
 
     for event in betting_events:
         # with open("events.json", "w") as f:
         #     json.dump(event, f)
-        if int(event["league"]) != NFL_LEAGUE_ID:
-            continue
 
         utc = pytz.UTC
         utc_time = current_date.astimezone(utc)
 
-        if event["player_name"] not in players:
+        player = player_matches.get(event["event_id"])
+        if player and player["game_id"] not in games:
+            print(f"Player is in game {player['game_id']}, which another job settles, skipping")
+            continue
+        if not player and owned_event_ids is not None and (
+                event["event_id"] not in owned_event_ids or not shared_complete):
+            print("Player not found in this job's games, leaving any DNP to the job that owns the event")
+            continue
+        if not player:
             try:
                 event_time = datetime.fromisoformat(event["start_time"].replace('Z', '+00:00'))
                 print(f"Event time: {event_time}, utc time: {utc_time}")
                 if event_time + timedelta(hours=3) < utc_time:
                     print("Player not found in game data, categorizing them as DNP")
                     print("Event", event)
-                    try:
-                        response = requests.post(
-                            f"{os.getenv('BACKEND_URL')}/actions/set-dnp",
-                            headers=get_hasura_headers(),
-                            json={"betting_event_id": event["event_id"]}
-                        )
-                        response.raise_for_status()
-                    except requests.exceptions.RequestException as e:
-                        logger.error(f"Failed to set DNP for event {event['event_id']}: {str(e)}")
+                    settlement.set_dnp(event)
                 else:
                     print("Player not found in game data but game hasn't started, skipping")
             except (ValueError, TypeError) as e:
@@ -143,68 +165,26 @@ def process_boxscores(game_ids: Set[str], current_date: datetime, testing: str,
             continue
         
         
-        stat_type = NFL_STAT_MAP.get(event["stat_type"])
-        if not stat_type:
+        updated_stat = calculate_stat_value(event["stat_type"], player)
+        if updated_stat is None:
             logger.warning(f"Stat type {event['stat_type']} not found in NFL_STAT_MAP")
             continue
-
-        updated_stat = calculate_stat_value(stat_type, players[event["player_name"]])
-        updated_event = update_betting_event(event, players[event["player_name"]], updated_stat, testing, testing_mode)
+        updated_event = update_betting_event(event, player, updated_stat, testing, testing_mode, settlement)
         print("updated_event", updated_event)
 
         if updated_event:
             new_betting_events.append(updated_event)
 
-        print("new_betting_events", new_betting_events)
-        if new_betting_events:
-            try:
-                updates = []
-                for event in new_betting_events:
-                    update_obj = {
-                        "where": { "event_id": { "_eq": event["event_id"] } },
-                        "_set": {
-                            "result_numeric": event["result_numeric"],
-                            "status": event["status"]
-                        }
-                    }
-                    updates.append(update_obj)
-
-                # Prepare the GraphQL payload
-                payload = {
-                    "query": """
-                        mutation updateBettingEventsMany($updates: [betting_events_updates!]!) {
-                        update_betting_events_many(updates: $updates) {
-                            affected_rows
-                            returning {
-                            event_id
-                            result_numeric
-                            status
-                            }
-                        }
-                        }
-                    """,
-                    "variables": {
-                        "updates": updates
-                    }
-                }
-
-                # Define headers and URL (make sure environment variables are set accordingly)
-                url = f"https://lasting-scorpion-21.hasura.app/v1/graphql"
-                headers = {
-                    "Content-Type": "application/json",
-                    "x-hasura-admin-secret": "DHieJhzOpml0wBIbEZC5mvsDdSKMnyMC4b8Kx04p0adKUO0zd2e2LSganKK6CRAb"
-                }
-
-                # Send the POST request
-                response = requests.post(url, headers=headers, json=payload)
-                print("response", response.json())
-                if response.status_code != [200, 201]:
-                    logger.error(f"Failed to bulk update betting events: {response.json()}")
-                    print(f"Bulk update failed: {response.json()}")
-
-            except requests.exceptions.RequestException as e:
-                logger.error(f"Failed to bulk update betting events: {str(e)}")
-                print(f"Bulk update failed: {str(e)}")
+    print(f"\nProcessed all events. {len(new_betting_events)} events to update")
+    if new_betting_events:
+        push_betting_event_updates(new_betting_events, "NFL")
+
+    settlement_results = settlement.flush()
+    failed = [result["event_id"] for result in settlement_results if not result["success"]]
+    print(f"Settled {len(settlement_results) - len(failed)} of {len(settlement_results)} events")
+    if failed:
+        print(f"Settlement failed for events: {failed}")
+    record_finalized_games("nfl", games, player_matches, settlement_results, BOXSCORE_TRACKER)
 
     return players
     
\ No newline at end of file
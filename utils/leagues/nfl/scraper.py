@@ -1,32 +1,19 @@
-from ..common.constants import LEAGUE_ENDPOINTS
-from ..common.helpers import find_next_game_date
-import requests
+from ..common.schedule_index import get_schedule_index, game_day
 import json
 from datetime import datetime
 
-def scrape_games(current_date: datetime) -> set:
-    """Scrape NFL games starting from current_date."""
+def scrape_game_schedule(current_date: datetime) -> list:
+    """Scrape NFL games on the next date with games, starting from current_date, with their start times and teams."""
+
+    schedule = get_schedule_index("nfl")
+    game_date = schedule.next_game_date(game_day(current_date))
+    if game_date is None:
+        print(f"No NFL games in the next 14 days from {current_date.strftime('%Y%m%d')}")
+        return []
 
-    current_date = datetime(2025, 2, 9)
-    game_ids = set()
-    
-    for check_date in find_next_game_date(current_date):
-        url = f"{LEAGUE_ENDPOINTS['nfl']}?dates={check_date.strftime('%Y%m%d')}"
-        print(url)
-        response = requests.get(url)
-        
-        if response.status_code == 200:
-            data = response.json()
-            events = data.get("events", [])
-            
-            if len(events) > 0:
-                for event in events:
-                    for competition in event.get("competitions", []):
-                        if game_id := competition.get("id"):
-                            game_ids.add(game_id)
-                break  # Found games, stop searching
-            else:
-                print(f"No NFL games on {check_date.strftime('%Y%m%d')}")
+    return sorted(schedule.games_on(game_date), key=lambda game: game["game_id"])
 
-    game_ids = sorted(list(game_ids))
-    return game_ids
\ No newline at end of file
+
+def scrape_games(current_date: datetime) -> set:
+    """Scrape NFL games on the next date with games, starting from current_date."""
+    return [game["game_id"] for game in scrape_game_schedule(current_date)]
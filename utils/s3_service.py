@@ -1,6 +1,11 @@
 import json
+import queue
+import sys
+import atexit
+import signal
+import threading
 from datetime import datetime
-from typing import Union, BinaryIO
+from typing import Union, BinaryIO, Optional
 import os 
 import dotenv
 import logging
@@ -14,6 +19,10 @@ dotenv.load_dotenv()
 
 logger = logging.getLogger(__name__)
 
+# Uploads waiting for the background worker; further uploads are dropped when full
+S3_UPLOAD_QUEUE_SIZE = int(os.getenv("S3_UPLOAD_QUEUE_SIZE", "256"))
+S3_UPLOAD_WORKERS = int(os.getenv("S3_UPLOAD_WORKERS", "2"))
+
 
 class S3Service:
     """Service class for handling AWS S3 operations"""
@@ -85,11 +94,90 @@ class S3Service:
             return None
 
 
+class S3Uploader:
+    """Uploads to S3 from background threads using one long-lived client"""
+
+    def __init__(
+        self,
+        max_queue_size: int = S3_UPLOAD_QUEUE_SIZE,
+        workers: int = S3_UPLOAD_WORKERS,
+        s3_service: Optional[S3Service] = None,
+    ):
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max_queue_size)
+        self._workers = workers
+        self._threads = []
+        self._s3_service = s3_service
+        self._lock = threading.Lock()
+
+    def _start(self) -> None:
+        with self._lock:
+            if self._threads:
+                return
+            # boto3 clients are thread safe, so every worker shares one
+            if self._s3_service is None:
+                self._s3_service = S3Service()
+            for i in range(self._workers):
+                thread = threading.Thread(target=self._run, name=f"s3-uploader-{i}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def _run(self) -> None:
+        while True:
+            data, s3_path = self._queue.get()
+            try:
+                self._s3_service.upload_file(data, s3_path)
+            except Exception as e:
+                logger.error(f"Error uploading to s3: {e}")
+            finally:
+                self._queue.task_done()
+
+    def submit(self, data: Union[str, bytes], s3_path: str) -> bool:
+        """
+        Queue an upload without waiting for it
+
+        Returns:
+            bool: True if the upload was queued, False if the queue was full
+        """
+        self._start()
+        try:
+            self._queue.put_nowait((data, s3_path))
+            return True
+        except queue.Full:
+            logger.warning(f"S3 upload queue full, dropping upload to {s3_path}")
+            return False
+
+    def flush(self) -> None:
+        """Block until every queued upload has finished"""
+        if self._threads:
+            self._queue.join()
+
+
+# Create a singleton instance
+s3_uploader = S3Uploader()
+# Don't lose queued uploads when the interpreter exits normally. SIGTERM (docker
+# stop) skips atexit hooks unless handled; see flush_uploads_on_sigterm.
+atexit.register(s3_uploader.flush)
+
+
+def flush_uploads_on_sigterm() -> None:
+    """
+    Make SIGTERM finish the queued uploads before exiting. Call from the main
+    thread of long-running entry points (app.py, run_scraper.py); rq workers
+    handle SIGTERM themselves and flush after every job.
+    """
+    def handle_sigterm(signum, frame):
+        logger.info("SIGTERM received, flushing queued S3 uploads")
+        s3_uploader.flush()
+        sys.exit(128 + signum)
+
+    signal.signal(signal.SIGTERM, handle_sigterm)
+
+
 def upload_to_s3(
     data: Union[str, dict], s3_path: str, include_timestamp: bool = True
 ) -> bool:
     """
-    Helper function to upload data to S3
+    Helper function to upload data to S3 in the background
 
     Args:
         data: The data to upload (string or dict)
@@ -97,13 +185,13 @@ def upload_to_s3(
         include_timestamp: Whether to include timestamp in filename
 
     Returns:
-        bool: True if upload was successful, False otherwise
+        bool: True if the upload was queued, False otherwise
     """
-    s3_service = S3Service()
-
-    # Convert data to JSON string if it's a dict or any other object
+    # Convert data to compact JSON if it's a dict or any other object. This
+    # happens here rather than on the worker so later changes to data can't
+    # leak into the upload.
     if not isinstance(data, (str, bytes)):
-        data = json.dumps(data, indent=2)
+        data = json.dumps(data, separators=(",", ":"))
 
     # Add timestamp to path if requested
     if include_timestamp:
@@ -112,7 +200,7 @@ def upload_to_s3(
         s3_path = f"{path_parts[0]}_{timestamp}.{path_parts[1]}"
 
     try:
-        return s3_service.upload_file(data, s3_path)
+        return s3_uploader.submit(data, s3_path)
     except Exception as e:
         print(f"Error uploading to s3: {e}")
         return False
\ No newline at end of file
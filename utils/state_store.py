@@ -0,0 +1,280 @@
+import os
+import json
+import time
+import sqlite3
+import logging
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+STATE_DB_PATH = os.getenv("STATE_DB_PATH", "espn_state.db")
+# Rows not touched for this long are dropped by compact()
+STATE_RETENTION_DAYS = int(os.getenv("STATE_RETENTION_DAYS", "7"))
+# compact() does nothing if it already ran within this window
+STATE_COMPACT_INTERVAL_SECONDS = int(os.getenv("STATE_COMPACT_INTERVAL_SECONDS", "3600"))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS game_snapshots (
+    league TEXT NOT NULL,
+    game_id TEXT NOT NULL,
+    fingerprint TEXT,
+    validators TEXT,
+    result TEXT,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (league, game_id)
+);
+CREATE TABLE IF NOT EXISTS name_matches (
+    league_id INTEGER NOT NULL,
+    event_name TEXT NOT NULL,
+    player_name TEXT NOT NULL,
+    updated_at REAL NOT NULL,
+    game_id TEXT,
+    PRIMARY KEY (league_id, event_name)
+);
+CREATE TABLE IF NOT EXISTS pushed_values (
+    event_id TEXT PRIMARY KEY,
+    result_numeric TEXT,
+    status TEXT,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS settled_events (
+    event_id TEXT PRIMARY KEY,
+    action TEXT NOT NULL,
+    updated_at REAL NOT NULL,
+    league TEXT,
+    game_id TEXT,
+    event TEXT,
+    actual_result REAL
+);
+CREATE TABLE IF NOT EXISTS finalized_games (
+    league TEXT NOT NULL,
+    game_id TEXT NOT NULL,
+    status TEXT,
+    stat_hash TEXT,
+    finalized_at REAL NOT NULL,
+    expires_at REAL NOT NULL,
+    PRIMARY KEY (league, game_id)
+);
+"""
+
+# Columns added after a table was first created, added to existing files on connect
+ADDED_COLUMNS = {
+    "name_matches": (("game_id", "TEXT"),),
+    "settled_events": (("league", "TEXT"), ("game_id", "TEXT"), ("event", "TEXT"), ("actual_result", "REAL")),
+}
+
+RETAINED_TABLES = ("game_snapshots", "name_matches", "pushed_values", "settled_events")
+ALL_TABLES = RETAINED_TABLES + ("finalized_games",)
+
+
+def _encode(value: Any) -> str:
+    # Parsed game results carry NumPy prop rows; store them as plain lists
+    return json.dumps(value, separators=(",", ":"), default=lambda o: o.tolist())
+
+
+class StateStore:
+    """
+    SQLite-backed state that survives restarts: per-game boxscore snapshots
+    and fingerprints, name-match results, the values last pushed for live
+    events, settled event IDs and finalized games.
+
+    One connection is shared by every thread behind a lock, and reopened in a
+    forked process (rq work-horses) rather than reused. compact() drops
+    rows older than retention_days and expired finalized games, so the file
+    stays small over a season.
+    """
+
+    def __init__(self, path: str = STATE_DB_PATH, retention_days: float = STATE_RETENTION_DAYS):
+        self.path = path
+        self.retention_seconds = retention_days * 24 * 3600
+        self._compacted_at = 0.0
+        self._lock = threading.Lock()
+        self._conn = None
+        self._pid = None
+
+    def _connection(self) -> sqlite3.Connection:
+        # Called with the lock held
+        if self._conn is None or self._pid != os.getpid():
+            self._conn = sqlite3.connect(self.path, check_same_thread=False, timeout=10)
+            self._pid = os.getpid()
+            if self.path != ":memory:":
+                self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(SCHEMA)
+            for table, columns in ADDED_COLUMNS.items():
+                existing = {row[1] for row in self._conn.execute(f"PRAGMA table_info({table})")}
+                for name, column_type in columns:
+                    if name not in existing:
+                        self._conn.execute(f"ALTER TABLE {table} ADD COLUMN {name} {column_type}")
+            self._conn.commit()
+        return self._conn
+
+    def _execute(self, sql: str, params: Iterable = ()) -> list:
+        with self._lock:
+            conn = self._connection()
+            rows = conn.execute(sql, tuple(params)).fetchall()
+            conn.commit()
+            return rows
+
+    def _executemany(self, sql: str, rows: Iterable[Tuple]) -> None:
+        with self._lock:
+            conn = self._connection()
+            conn.executemany(sql, rows)
+            conn.commit()
+
+    # Boxscore snapshots
+
+    def load_snapshot(self, league: str, game_id: str) -> Optional[Dict]:
+        """A game's last {"fingerprint", "validators", "result"}, None if not stored"""
+        rows = self._execute(
+            "SELECT fingerprint, validators, result FROM game_snapshots WHERE league = ? AND game_id = ?",
+            (league, game_id)
+        )
+        if not rows:
+            return None
+        fingerprint, validators, result = rows[0]
+        return {
+            "fingerprint": fingerprint,
+            "validators": json.loads(validators) if validators else {},
+            "result": json.loads(result) if result else None,
+        }
+
+    def save_snapshot(self, league: str, game_id: str, fingerprint: Optional[str],
+                      validators: Dict[str, str], result: Any) -> None:
+        self._execute(
+            "INSERT OR REPLACE INTO game_snapshots VALUES (?, ?, ?, ?, ?, ?)",
+            (league, game_id, fingerprint, _encode(validators), _encode(result), time.time())
+        )
+
+    def delete_snapshot(self, league: str, game_id: str) -> None:
+        self._execute("DELETE FROM game_snapshots WHERE league = ? AND game_id = ?", (league, game_id))
+
+    # Name matches
+
+    def get_name_matches(self, league_id: int, event_names: Iterable[str]) -> Dict[str, Tuple[str, str]]:
+        """Roster names (and the game they were in) previously matched to these event names"""
+        names = list(set(event_names))
+        matches = {}
+        # Stay well under SQLite's bound parameter limit
+        for start in range(0, len(names), 500):
+            chunk = names[start:start + 500]
+            rows = self._execute(
+                f"SELECT event_name, player_name, game_id FROM name_matches WHERE league_id = ? "
+                f"AND event_name IN ({','.join('?' * len(chunk))})",
+                [league_id, *chunk]
+            )
+            matches.update({event_name: (player_name, game_id) for event_name, player_name, game_id in rows})
+        return matches
+
+    def save_name_matches(self, league_id: int, matches: Dict[str, Tuple[str, str]]) -> None:
+        """Store event name -> (roster name, game_id) matches"""
+        now = time.time()
+        self._executemany(
+            "INSERT OR REPLACE INTO name_matches (league_id, event_name, player_name, updated_at, game_id) "
+            "VALUES (?, ?, ?, ?, ?)",
+            [(league_id, event_name, player_name, now, game_id) for event_name, (player_name, game_id) in matches.items()]
+        )
+
+    # Pushed values
+
+    def load_pushed_values(self) -> Dict[str, Tuple[str, str]]:
+        rows = self._execute("SELECT event_id, result_numeric, status FROM pushed_values")
+        return {event_id: (result_numeric, status) for event_id, result_numeric, status in rows}
+
+    def save_pushed_values(self, values: Dict[str, Tuple[str, str]]) -> None:
+        now = time.time()
+        self._executemany(
+            "INSERT OR REPLACE INTO pushed_values VALUES (?, ?, ?, ?)",
+            [(event_id, result_numeric, status, now) for event_id, (result_numeric, status) in values.items()]
+        )
+
+    def delete_pushed_value(self, event_id: str) -> None:
+        self._execute("DELETE FROM pushed_values WHERE event_id = ?", (event_id,))
+
+    def clear_pushed_values(self) -> None:
+        self._execute("DELETE FROM pushed_values")
+
+    # Settled events
+
+    def mark_settled(self, event_id: str, action: str, league: Optional[str] = None, game_id: Optional[str] = None,
+                     event: Optional[Dict] = None, actual_result: Optional[float] = None) -> None:
+        """Record a settled event, with the game and value it was completed with when known"""
+        self._execute(
+            "INSERT OR REPLACE INTO settled_events (event_id, action, updated_at, league, game_id, event, actual_result) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (event_id, action, time.time(), league, game_id, _encode(event) if event else None, actual_result)
+        )
+
+    def settled_events_for_game(self, league: str, game_id: str) -> List[Dict]:
+        """A game's settled events as {"event_id", "action", "event", "actual_result"}"""
+        rows = self._execute(
+            "SELECT event_id, action, event, actual_result FROM settled_events WHERE league = ? AND game_id = ?",
+            (league, game_id)
+        )
+        return [
+            {"event_id": event_id, "action": action, "event": json.loads(event) if event else None, "actual_result": actual_result}
+            for event_id, action, event, actual_result in rows
+        ]
+
+    def is_settled(self, event_id: str) -> bool:
+        return bool(self._execute("SELECT 1 FROM settled_events WHERE event_id = ?", (event_id,)))
+
+    # Finalized games
+
+    def load_finalized_games(self) -> Dict[Tuple[str, str], Dict]:
+        rows = self._execute(
+            "SELECT league, game_id, status, stat_hash, finalized_at, expires_at FROM finalized_games WHERE expires_at > ?",
+            (time.time(),)
+        )
+        return {
+            (league, game_id): {"status": status, "stat_hash": stat_hash, "finalized_at": finalized_at, "expires_at": expires_at}
+            for league, game_id, status, stat_hash, finalized_at, expires_at in rows
+        }
+
+    def save_finalized_game(self, league: str, game_id: str, entry: Dict) -> None:
+        self._execute(
+            "INSERT OR REPLACE INTO finalized_games VALUES (?, ?, ?, ?, ?, ?)",
+            (league, game_id, entry["status"], entry["stat_hash"], entry["finalized_at"], entry["expires_at"])
+        )
+
+    def delete_finalized_game(self, league: str, game_id: str) -> None:
+        self._execute("DELETE FROM finalized_games WHERE league = ? AND game_id = ?", (league, game_id))
+
+    # Maintenance
+
+    def clear(self) -> None:
+        """Delete every row, e.g. to replay a slate from a cold start"""
+        with self._lock:
+            conn = self._connection()
+            for table in ALL_TABLES:
+                conn.execute(f"DELETE FROM {table}")
+            conn.commit()
+
+    def compact(self, force: bool = False) -> Dict[str, int]:
+        """
+        Drop rows older than the retention window and expired finalized games,
+        then reclaim the space. Runs at most once per STATE_COMPACT_INTERVAL_SECONDS
+        unless forced. Returns the rows removed per table.
+        """
+        now = time.time()
+        if not force and now - self._compacted_at < STATE_COMPACT_INTERVAL_SECONDS:
+            return {}
+        self._compacted_at = now
+
+        removed = {}
+        with self._lock:
+            conn = self._connection()
+            for table in RETAINED_TABLES:
+                cursor = conn.execute(f"DELETE FROM {table} WHERE updated_at < ?", (now - self.retention_seconds,))
+                removed[table] = cursor.rowcount
+            cursor = conn.execute("DELETE FROM finalized_games WHERE expires_at < ?", (now,))
+            removed["finalized_games"] = cursor.rowcount
+            conn.commit()
+            if sum(removed.values()):
+                conn.execute("VACUUM")
+        logger.info(f"State store compacted: {removed}")
+        return removed
+
+
+# Create a singleton instance
+STATE_STORE = StateStore()
@@ -0,0 +1,88 @@
+import os
+import logging
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import requests
+from redis import Redis
+from redis.exceptions import RedisError
+from rq import Queue
+from rq.job import Job, JobStatus
+
+from utils.job_service import JobService
+from utils.s3_service import s3_uploader
+from utils.leagues.nba import processor as nba_processor
+from utils.leagues.nfl import processor as nfl_processor
+from utils.leagues.cbb import processor as cbb_processor
+
+logger = logging.getLogger(__name__)
+
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+QUEUE_NAME = os.getenv("SCRAPER_QUEUE", "espn")
+
+LEAGUE_PROCESSORS = {
+    'nba': nba_processor,
+    'nfl': nfl_processor,
+    'cbb': cbb_processor,
+}
+
+job_service = JobService()
+
+
+def get_queue() -> Queue:
+    """The rq queue game jobs are enqueued on and workers listen to"""
+    return Queue(QUEUE_NAME, connection=Redis.from_url(REDIS_URL))
+
+
+def unfinished_jobs(job_ids: List[str]) -> List[str]:
+    """
+    The rq jobs among job_ids that are still queued or running. Redis errors
+    are logged and treated as nothing pending.
+    """
+    if not job_ids:
+        return []
+    queue = get_queue()
+    try:
+        jobs = Job.fetch_many(job_ids, connection=queue.connection)
+        pending = (JobStatus.QUEUED, JobStatus.STARTED, JobStatus.DEFERRED, JobStatus.SCHEDULED)
+        return [job.id for job in jobs if job is not None and job.get_status() in pending]
+    except RedisError as e:
+        logger.error(f"Could not check the status of rq jobs: {str(e)}")
+        return []
+
+
+def record_job_status(job_id: Optional[str], status: str, result: Optional[Dict] = None) -> None:
+    """Update a jobs_espn row; a failed update is logged rather than failing the work"""
+    if not job_id:
+        return
+    try:
+        job_service.update_job_status(job_id, status, result)
+    except requests.exceptions.RequestException as e:
+        logger.error(f"Failed to record status {status} for job {job_id}: {str(e)}")
+
+
+def process_game_group(league: str, game_ids: List[str], current_date: datetime,
+                       betting_events: List[Dict], job_id: Optional[str] = None,
+                       shared_game_ids: Optional[List[str]] = None,
+                       owned_event_ids: Optional[List[str]] = None) -> Dict:
+    """
+    rq job: fetch, parse and settle one group of a league's games against the
+    betting events that map to them, recording progress on its jobs_espn row.
+    shared_game_ids and owned_event_ids come from group_games.
+    """
+    result = {"league": league, "game_ids": game_ids, "betting_events": len(betting_events)}
+    record_job_status(job_id, "running", result)
+    try:
+        LEAGUE_PROCESSORS[league].process_boxscores(
+            game_ids, current_date, testing_mode=False, testing="", betting_events=betting_events,
+            shared_game_ids=shared_game_ids, owned_event_ids=owned_event_ids
+        )
+    except Exception as e:
+        logger.error(f"Error processing {league.upper()} games {game_ids}: {str(e)}", exc_info=True)
+        record_job_status(job_id, "failed", {**result, "error": str(e)})
+        raise
+    finally:
+        # rq work-horses leave with os._exit, which skips the atexit flush
+        s3_uploader.flush()
+    record_job_status(job_id, "completed", result)
+    return result
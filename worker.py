@@ -0,0 +1,19 @@
+#!/usr/bin/env python
+from dotenv import load_dotenv
+load_dotenv()
+
+from rq import Worker
+from utils.tasks import get_queue
+import logging
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger('espn_scraper_worker')
+
+if __name__ == "__main__":
+    queue = get_queue()
+    logger.info(f"Starting worker on queue {queue.name}")
+    Worker([queue], connection=queue.connection).work()